@@ -7,14 +7,28 @@ Returns days since apple was cut using variety-specific or combined models
 from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-import tensorflow as tf
 import numpy as np
-from PIL import Image, ImageOps
-import io
+import os
 import json
+import time
+import queue
+import random
+import mimetypes
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import functools
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+from preprocessing import (  # noqa: F401 - re-exported for the benchmark/validation scripts
+    FAST_DECODE, MODEL_INPUT_SIZE, CROP_MIN_FRACTION, NORMALIZE_MODE, NORMALIZE_PROXY_SIZE, _preprocess_image
+)
+
 app = FastAPI(title="Apple Oxidation Days API - Variety Specific")
 
 # CORS Configuration
@@ -50,6 +64,13 @@ MODEL_PATHS = {
     'red_delicious': BASE_DIR / "apple_oxidation_days_model_red_delicious.h5"
 }
 
+# Fused model: all variety models merged into one graph with one output head per
+# variety (built by build_fused_model.py). USE_FUSED_MODEL=1 serves /analyze_all
+# with a single forward pass.
+FUSED_MODEL_PATH = BASE_DIR / "apple_oxidation_days_model_fused.h5"
+FUSED_METADATA_PATH = BASE_DIR / "model_metadata_fused.json"
+USE_FUSED_MODEL = os.environ.get("USE_FUSED_MODEL", "0") == "1"
+
 METADATA_PATHS = {
     'combined': BASE_DIR / "model_metadata_regression_combined.json",
     'gala': BASE_DIR / "model_metadata_regression_gala.json",
@@ -57,9 +78,84 @@ METADATA_PATHS = {
     'red_delicious': BASE_DIR / "model_metadata_regression_red_delicious.json"
 }
 
-# Store loaded models
-models = {}
+# Inference backend: 'keras' (default), 'tflite' or 'onnx'. TFLite/ONNX files are
+# written next to the .h5 files by export_regression_models.py.
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "keras").lower()
+TFLITE_THREADS = int(os.environ.get("TFLITE_THREADS", str(os.cpu_count() or 1)))
+# Quantized TFLite variant: '' (float32), 'dynamic' or 'int8'. Variants are only
+# published by quantize_regression_models.py when they pass its accuracy gate.
+TFLITE_VARIANT = os.environ.get("TFLITE_VARIANT", "").lower()
+# Keras models run through a tf.function per batch-size bucket (padded to the next
+# power of two) instead of model.predict. KERAS_TF_FUNCTION=0 uses model.predict.
+KERAS_TF_FUNCTION = os.environ.get("KERAS_TF_FUNCTION", "1") == "1"
+
+# Models are loaded on first use and at most MAX_RESIDENT_MODELS stay in memory
+# (least recently used is unloaded; 0 = no limit). PREWARM_VARIETIES are loaded at
+# startup: a comma-separated list, 'all' (default) or 'none'.
+MAX_RESIDENT_MODELS = int(os.environ.get("MAX_RESIDENT_MODELS", "0"))
+PREWARM_VARIETIES = os.environ.get("PREWARM_VARIETIES", "all").lower()
+
+# Model metadata (variety -> training metadata JSON)
 metadata_store = {}
+model_versions = {}  # variety -> content hash of the loaded .h5 (part of cache keys)
+
+# Micro-batching for /analyze: concurrent requests for the same variety are
+# coalesced into one forward pass (override with env vars on Cloud Run)
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "5"))
+
+# Max images waiting in one variety's batch queue before /analyze returns 503
+BATCH_MAX_QUEUE = int(os.environ.get("BATCH_MAX_QUEUE", "64"))
+
+# One batcher per variety, created on first use
+batchers = {}
+
+# Decode/crop/normalize settings (FAST_DECODE, CROP_MIN_FRACTION, NORMALIZE_MODE, ...)
+# live in preprocessing.py
+
+# /batch_analyze runs one forward pass per chunk of this many images
+BATCH_ANALYZE_CHUNK_SIZE = max(1, int(os.environ.get("BATCH_ANALYZE_CHUNK_SIZE", "32")))
+
+# Worker pools keep CPU-bound work off the event loop so /health stays responsive.
+# PREPROCESS_EXECUTOR=process moves PIL/NumPy preprocessing into separate processes.
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "2"))
+PREPROCESS_WORKERS = int(os.environ.get("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+PREPROCESS_EXECUTOR = os.environ.get("PREPROCESS_EXECUTOR", "thread").lower()
+PREPROCESS_MAX_PENDING = int(os.environ.get("PREPROCESS_MAX_PENDING", "32"))
+
+# Prediction cache: repeated uploads (app retries, one photo against several
+# varieties) skip decode, preprocessing and inference. Set PREDICTION_CACHE_DB to
+# a SQLite file on local disk to keep hits across restarts and share them between
+# server processes on the same host. SQLite locking is not safe on network
+# filesystems (GCS/NFS mounts), so don't point it at storage shared by instances.
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "1024"))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "3600"))
+PREDICTION_CACHE_DB = os.environ.get("PREDICTION_CACHE_DB", "")
+
+# Request capture: a sampled fraction of uploads is saved raw (no re-encode) by a
+# background writer into a ring buffer of the last CAPTURE_MAX_FILES uploads, to
+# inspect what phones actually send. Off by default.
+CAPTURE_SAMPLE_RATE = float(os.environ.get("CAPTURE_SAMPLE_RATE", "0"))
+CAPTURE_DIR = Path(os.environ.get("CAPTURE_DIR", str(BASE_DIR / "captures")))
+CAPTURE_MAX_FILES = int(os.environ.get("CAPTURE_MAX_FILES", "50"))
+CAPTURE_MAX_AGE_HOURS = float(os.environ.get("CAPTURE_MAX_AGE_HOURS", "24"))
+CAPTURE_QUEUE_SIZE = int(os.environ.get("CAPTURE_QUEUE_SIZE", "8"))
+
+# Startup: 'eager' (default) imports TensorFlow and loads models before the server
+# accepts requests. 'background' binds the port immediately and does both in a
+# background task; /health answers right away and /ready turns 200 once done.
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager").lower()
+_startup_started = time.perf_counter()
+
+# Spawned preprocessing workers re-import the launch script (python apple_api_regression.py)
+# as __mp_main__. They only call preprocessing._preprocess_image, so skip TensorFlow, the
+# cache DB and the process pool there.
+_IN_SPAWNED_WORKER = __name__ == "__mp_main__"
+
+# The first load of each model (startup or first use) runs one dummy predict per batch
+# size requests can use, so real requests don't pay graph tracing. Reloads after a
+# MAX_RESIDENT_MODELS eviction only warm batch size 1 to keep them short.
+WARMUP_INFERENCE = os.environ.get("WARMUP_INFERENCE", "1") == "1"
 
 def _patch_keras_for_new_models():
     """Patch Keras layers to accept quantization_config from newer Keras versions."""
@@ -72,185 +168,837 @@ def _patch_keras_for_new_models():
             return patched
         layer_cls.__init__ = make_patched(original_init)
 
-_patch_keras_for_new_models()
+
+# TensorFlow takes seconds to import, so it is imported on demand (see STARTUP_MODE)
+tf = None
+_tf_lock = threading.Lock()
+
+
+def _import_tensorflow():
+    """Import TensorFlow and patch Keras once (safe to call from any thread)"""
+    global tf
+    with _tf_lock:
+        if tf is None:
+            import tensorflow
+            _patch_keras_for_new_models()
+            tf = tensorflow
+    return tf
+
+
+if STARTUP_MODE != 'background' and not _IN_SPAWNED_WORKER:
+    _import_tensorflow()
+
+
+def batch_bucket(batch_size):
+    """Smallest power of two >= batch_size (batches are padded up to it)"""
+    return 1 << max(0, int(batch_size) - 1).bit_length()
+
+
+class KerasBackend:
+    """
+    Serves a .h5 model through tf.keras (the reference implementation).
+    model.predict builds a data adapter and iterator on every call, so by
+    default batches are padded to a power-of-two bucket and run through a
+    tf.function traced once per bucket with a fixed input signature.
+    """
+    name = 'keras'
+
+    def __init__(self, path, compiled=None):
+        _import_tensorflow()
+        self.path = Path(path)
+        self.model = tf.keras.models.load_model(self.path)
+        self.compiled = KERAS_TF_FUNCTION if compiled is None else compiled
+        self.input_shape = tuple(self.model.input_shape[1:])
+        self.input_size = tuple(int(d) for d in self.input_shape[:2])
+        self.functions = {}  # bucket size -> tf.function
+        self.functions_lock = threading.Lock()
+
+    def _function(self, bucket):
+        with self.functions_lock:
+            if bucket not in self.functions:
+                spec = tf.TensorSpec((bucket, *self.input_shape), tf.float32)
+                self.functions[bucket] = tf.function(
+                    lambda images: self.model(images, training=False), input_signature=[spec]
+                )
+            return self.functions[bucket]
+
+    def predict(self, batch):
+        if not self.compiled:
+            return self.model.predict(batch, verbose=0)
+
+        size = len(batch)
+        bucket = batch_bucket(size)
+        padded = np.zeros((bucket, *self.input_shape), dtype=np.float32)
+        padded[:size] = batch
+        outputs = self._function(bucket)(tf.constant(padded))
+        # Multi-head models return one (n, 1) tensor per head
+        if isinstance(outputs, (list, tuple)):
+            return [output.numpy()[:size] for output in outputs]
+        return outputs.numpy()[:size]
+
+    def describe(self):
+        mode = "tf.function" if self.compiled else "model.predict"
+        height, width = self.input_size
+        return f"{self.model.count_params():,} parameters, {height}x{width} input ({mode})"
+
+
+class TFLiteBackend:
+    """
+    Serves a .tflite export through the TFLite interpreter, which skips
+    Keras' per-call data adapter overhead. The interpreter is not thread
+    safe, so calls are serialized with a lock.
+    """
+    name = 'tflite'
+
+    def __init__(self, path):
+        _import_tensorflow()
+        self.path = Path(path)
+        self.interpreter = tf.lite.Interpreter(model_path=str(self.path), num_threads=TFLITE_THREADS)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.outputs = self.interpreter.get_output_details()
+        self.batch_size = int(self.input['shape'][0])
+        self.input_size = tuple(int(d) for d in self.input['shape'][1:3])
+        self.lock = threading.Lock()
+
+    def predict(self, batch):
+        with self.lock:
+            if batch.shape[0] != self.batch_size:
+                self.interpreter.resize_tensor_input(self.input['index'], list(batch.shape))
+                self.interpreter.allocate_tensors()
+                self.input = self.interpreter.get_input_details()[0]
+                self.outputs = self.interpreter.get_output_details()
+                self.batch_size = batch.shape[0]
+
+            self.interpreter.set_tensor(self.input['index'], self._quantize(batch, self.input))
+            self.interpreter.invoke()
+            results = [self._dequantize(self.interpreter.get_tensor(o['index']), o) for o in self.outputs]
+        return results[0] if len(results) == 1 else results
+
+    @staticmethod
+    def _quantize(batch, detail):
+        """Map float input onto an integer-only model's input scale"""
+        scale, zero_point = detail['quantization']
+        if detail['dtype'] == np.float32 or scale == 0:
+            return batch.astype(np.float32)
+        info = np.iinfo(detail['dtype'])
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(detail['dtype'])
+
+    @staticmethod
+    def _dequantize(values, detail):
+        scale, zero_point = detail['quantization']
+        if detail['dtype'] == np.float32 or scale == 0:
+            return values
+        return (values.astype(np.float32) - zero_point) * scale
+
+    def describe(self):
+        return f"TFLite, {self.path.stat().st_size / 1e6:.1f} MB"
+
+
+class OnnxBackend:
+    """Serves a .onnx export through ONNX Runtime (pip install onnxruntime)"""
+    name = 'onnx'
+
+    def __init__(self, path):
+        import onnxruntime
+        self.path = Path(path)
+        self.session = onnxruntime.InferenceSession(str(self.path), providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_size = tuple(model_input.shape[1:3])
+
+    def predict(self, batch):
+        results = self.session.run(None, {self.input_name: batch.astype(np.float32)})
+        return results[0] if len(results) == 1 else results
+
+    def describe(self):
+        return f"ONNX Runtime, {self.path.stat().st_size / 1e6:.1f} MB"
+
+
+INFERENCE_BACKENDS = {
+    'keras': (KerasBackend, '.h5'),
+    'tflite': (TFLiteBackend, '.tflite'),
+    'onnx': (OnnxBackend, '.onnx'),
+}
+
+
+def resolve_backend(model_path):
+    """
+    Backend class and file for a variety model under the configured INFERENCE_BACKEND.
+    Falls back to Keras when the exported file is missing.
+    """
+    if INFERENCE_BACKEND not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{INFERENCE_BACKEND}'. Use one of {list(INFERENCE_BACKENDS)}")
+
+    backend_cls, suffix = INFERENCE_BACKENDS[INFERENCE_BACKEND]
+    exported_path = Path(model_path).with_suffix(suffix)
+    if INFERENCE_BACKEND == 'tflite' and TFLITE_VARIANT:
+        exported_path = exported_path.with_name(f"{exported_path.stem}_{TFLITE_VARIANT}{suffix}")
+    if exported_path.exists():
+        return backend_cls, exported_path
+
+    print(f"   ⚠️  {exported_path.name} not found - using Keras (run export_regression_models.py)")
+    return KerasBackend, Path(model_path)
+
+
+def load_backend(model_path):
+    """Load a variety model with the configured INFERENCE_BACKEND"""
+    backend_cls, path = resolve_backend(model_path)
+    return backend_cls(path)
+
+
+class ModelRegistry:
+    """
+    Variety models, loaded on first use. Concurrent first requests for a
+    variety share one load, and at most max_resident models are in memory or
+    loading (the least recently used one is unloaded before another loads, and
+    reloaded when needed again).
+    Internal models (the fused multi-head model) load the same way but are not
+    listed as varieties.
+    """
+
+    def __init__(self, max_resident=MAX_RESIDENT_MODELS):
+        self.max_resident = max_resident
+        self.available = {}  # variety -> (backend class, model file)
+        self.internal = set()
+        self.resident = OrderedDict()  # variety -> loaded backend, least recently used first
+        self.loading = set()
+        self.capacity = asyncio.Condition()
+        self.locks = {}
+        self.load_seconds = {}
+        self.warmup_seconds = {}
+        self.input_sizes = {}  # variety -> (height, width), kept after eviction
+        self.loads = 0
+        self.evictions = 0
+
+    def register(self, variety, backend_cls, path, internal=False):
+        self.available[variety] = (backend_cls, Path(path))
+        if internal:
+            self.internal.add(variety)
+
+    def __contains__(self, variety):
+        return variety in self.available and variety not in self.internal
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        return [v for v in self.available if v not in self.internal]
+
+    async def get(self, variety):
+        """Loaded backend for a variety (raises 503 if it can't be loaded)"""
+        backend = self.resident.get(variety)
+        if backend is not None:
+            self.resident.move_to_end(variety)
+            return backend
+
+        async with self.locks.setdefault(variety, asyncio.Lock()):
+            backend = self.resident.get(variety)
+            if backend is None:
+                return await self._load(variety)
+            self.resident.move_to_end(variety)
+            return backend
+
+    async def input_size(self, variety):
+        """(height, width) a model takes - uploads are preprocessed straight to it"""
+        if variety not in self.input_sizes:
+            await self.get(variety)
+        return self.input_sizes[variety]
+
+    async def _load(self, variety):
+        if variety not in self.available:
+            raise HTTPException(status_code=503, detail=f"Model '{variety}' not loaded. Available models: {self.keys()}")
+
+        await self._reserve(variety)
+        try:
+            return await self._load_reserved(variety)
+        finally:
+            async with self.capacity:
+                self.loading.discard(variety)
+                self.capacity.notify_all()
+
+    async def _reserve(self, variety):
+        """Make room before loading, so concurrent first loads can't exceed max_resident"""
+        async with self.capacity:
+            while self.max_resident > 0 and len(self.resident) + len(self.loading) >= self.max_resident:
+                if not self.resident:
+                    await self.capacity.wait()  # every slot is taken by a load in progress
+                    continue
+                # In-flight predictions keep their own reference, so unloading is safe
+                evicted, _ = self.resident.popitem(last=False)
+                self.evictions += 1
+                print(f"♻️  {evicted.upper():10} model unloaded (MAX_RESIDENT_MODELS={self.max_resident})")
+            self.loading.add(variety)
+
+    async def _load_reserved(self, variety):
+        backend_cls, path = self.available[variety]
+        start = time.perf_counter()
+        try:
+            # Off the event loop: loading a model takes seconds
+            backend = await asyncio.get_running_loop().run_in_executor(None, backend_cls, path)
+        except Exception as e:
+            print(f"❌ {variety.upper():10} failed to load: {e}")
+            raise HTTPException(status_code=503, detail=f"Model '{variety}' failed to load: {e}")
+        self.load_seconds[variety] = round(time.perf_counter() - start, 3)
+        self.input_sizes[variety] = backend.input_size
+
+        # First load: every batch size requests can use. Reload after eviction: batch
+        # size 1 only, so a request for an evicted model isn't held up by seconds of tracing
+        if WARMUP_INFERENCE:
+            batch_sizes = [1] if variety in self.warmup_seconds else warmup_batch_sizes()
+            start = time.perf_counter()
+            await asyncio.get_running_loop().run_in_executor(None, _warm_up, backend, batch_sizes)
+            self.warmup_seconds[variety] = round(time.perf_counter() - start, 3)
+
+        self.loads += 1
+        self.resident[variety] = backend
+        warm_text = f" + {self.warmup_seconds[variety]:.1f}s warm-up" if WARMUP_INFERENCE else ""
+        print(f"✅ {variety.upper():10} model loaded in {self.load_seconds[variety]:.1f}s{warm_text}: {backend.describe()}")
+        return backend
+
+    def stats(self):
+        return {
+            "available": self.keys(),
+            "internal": sorted(self.internal),
+            "resident": list(self.resident),
+            "loading": sorted(self.loading),
+            "max_resident": self.max_resident or None,
+            "load_seconds": dict(self.load_seconds),
+            "warmup_seconds": dict(self.warmup_seconds),
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
+
+
+model_registry = ModelRegistry()
+
+
+def warmup_batch_sizes():
+    """Batch sizes requests can reach: powers of two up to the micro-batch and /batch_analyze limits"""
+    largest = max(BATCH_MAX_SIZE, BATCH_ANALYZE_CHUNK_SIZE, 1)
+    sizes = {BATCH_MAX_SIZE, BATCH_ANALYZE_CHUNK_SIZE}
+    size = 1
+    while size <= largest:
+        sizes.add(size)
+        size *= 2
+    return sorted(s for s in sizes if s > 0)
+
+
+def _warm_up(backend, batch_sizes=None):
+    """One dummy forward pass per batch size so graph tracing happens before real traffic"""
+    for batch_size in batch_sizes or warmup_batch_sizes():
+        backend.predict(np.zeros((batch_size, *backend.input_size, 3)))
+
+
+# Readiness (separate from liveness): /ready returns 503 until startup finishes
+startup_state = {"ready": False, "stage": "starting", "error": None, "seconds": None}
+
+
+def _prewarm_varieties():
+    """
+    Varieties named by PREWARM_VARIETIES that have a model file. With the fused
+    model in use only it is pre-loaded: it already holds every variety's weights,
+    and single-variety models load on their first /analyze.
+    """
+    if PREWARM_VARIETIES == 'all':
+        varieties = model_registry.keys()
+    elif PREWARM_VARIETIES in ('', 'none'):
+        varieties = []
+    else:
+        varieties = [v.strip() for v in PREWARM_VARIETIES.split(',') if v.strip() in model_registry]
+    if varieties and 'fused' in model_registry.internal:
+        return ['fused']
+    if model_registry.max_resident > 0:
+        varieties = varieties[:model_registry.max_resident]
+    return varieties
+
 
 @app.on_event("startup")
+async def startup():
+    """Load models now (STARTUP_MODE=eager) or in a background task (background)"""
+    if STARTUP_MODE == 'background':
+        print("🚀 STARTUP_MODE=background: serving /health now, loading models in the background")
+        app.state.startup_task = asyncio.create_task(load_models())
+    else:
+        await load_models()
+
+
 async def load_models():
-    """Load all available models on startup"""
-    global models, metadata_store
+    """Import TensorFlow, register every available model and pre-load PREWARM_VARIETIES"""
+    loop = asyncio.get_running_loop()
+    try:
+        startup_state["stage"] = "importing tensorflow"
+        await loop.run_in_executor(None, _import_tensorflow)
+
+        startup_state["stage"] = "loading models"
+        await _load_models()
+    except Exception as e:
+        startup_state.update(stage="failed", error=str(e))
+        print(f"❌ Startup failed: {e}")
+        return
+
+    startup_state.update(ready=True, stage="ready", seconds=round(time.perf_counter() - _startup_started, 3))
+    print(f"✅ Ready in {startup_state['seconds']:.1f}s")
 
+
+async def _load_models():
     print("\n🍎 Loading Apple Oxidation Models...")
     print("=" * 50)
 
+    loop = asyncio.get_running_loop()
     for variety, model_path in MODEL_PATHS.items():
         if model_path.exists():
             try:
-                models[variety] = tf.keras.models.load_model(model_path)
-                print(f"✅ {variety.upper():10} model loaded: {models[variety].count_params():,} parameters")
-                
+                backend_cls, path = resolve_backend(model_path)
+                model_registry.register(variety, backend_cls, path)
+                digest = await loop.run_in_executor(None, _file_digest, path)
+                model_versions[variety] = f"{backend_cls.name}-{digest}"
+
                 metadata_path = METADATA_PATHS[variety]
                 if metadata_path.exists():
                     with open(metadata_path, 'r') as f:
                         metadata_store[variety] = json.load(f)
                     mae = metadata_store[variety].get('validation_mae', 'N/A')
-                    print(f"   {'':10} MAE = {mae:.3f} days")
+                    print(f"📦 {variety.upper():10} model available ({backend_cls.name}), MAE = {mae:.3f} days")
+                else:
+                    print(f"📦 {variety.upper():10} model available ({backend_cls.name})")
             except Exception as e:
-                print(f"❌ {variety.upper():10} failed to load: {e}")
+                print(f"❌ {variety.upper():10} failed to register: {e}")
         else:
             print(f"⚠️  {variety.upper():10} model not found at {model_path}")
-    
+
+    if USE_FUSED_MODEL:
+        load_fused_model()
+
+    for variety in _prewarm_varieties():
+        try:
+            await model_registry.get(variety)
+        except HTTPException:
+            pass  # logged by the registry; requests retry the load
+
     print("=" * 50)
-    print(f"Total models loaded: {len(models)}/4\n")
+    available = sum(1 for v in MODEL_PATHS if v in model_registry)
+    print(f"Total models available: {available}/{len(MODEL_PATHS)} "
+          f"(loaded: {', '.join(model_registry.resident) or 'none - on first request'})\n")
+
+
+def load_fused_model():
+    """Load the fused multi-head model if it was built from the current .h5 files"""
+    if not FUSED_MODEL_PATH.exists() or not FUSED_METADATA_PATH.exists():
+        print(f"⚠️  {'FUSED':10} model not found - run build_fused_model.py")
+        return
+
+    with open(FUSED_METADATA_PATH, 'r') as f:
+        fused_metadata = json.load(f)
+
+    # Heads must match the per-variety models (and their cache keys) exactly
+    stale = [v for v, digest in fused_metadata['source_models'].items()
+             if not MODEL_PATHS[v].exists() or _file_digest(MODEL_PATHS[v]) != digest]
+    if stale:
+        print(f"⚠️  {'FUSED':10} model is stale for {stale} - rebuild with build_fused_model.py")
+        return
+
+    model_registry.register('fused', KerasBackend, FUSED_MODEL_PATH, internal=True)
+    metadata_store['fused'] = fused_metadata
+    print(f"📦 {'FUSED':10} model available: heads = {fused_metadata['varieties']}")
 
-def auto_crop_apple(image):
+class ServerBusyError(HTTPException):
+    """Raised when a worker queue is full - the client should retry shortly"""
+
+    def __init__(self, detail):
+        super().__init__(status_code=503, detail=detail, headers={"Retry-After": "1"})
+
+
+class BoundedExecutor:
     """
-    Auto-crop apple from background by detecting the foreground object.
-    Samples the image border to determine background color, then finds
-    regions that differ from it. Works with any background color.
-    Returns (cropped_image, was_cropped) tuple.
+    Thread or process pool with a cap on queued + running jobs.
+    Jobs past the cap are rejected with a 503 instead of piling up, so tail
+    latency stays predictable when the instance is saturated.
     """
-    orig_w, orig_h = image.size
 
-    # Downscale for analysis to save memory (full-res images can be 5000x3000+)
-    max_analysis_dim = 512
-    if max(orig_w, orig_h) > max_analysis_dim:
-        scale = max_analysis_dim / max(orig_w, orig_h)
-        analysis_img = image.resize((int(orig_w * scale), int(orig_h * scale)))
-    else:
-        scale = 1.0
-        analysis_img = image
+    def __init__(self, name, executor, max_workers, max_pending):
+        self.name = name
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_pending = max(1, max_pending)
+        self.pending = 0
+        self.rejected = 0
 
-    img_array = np.array(analysis_img, dtype=np.float32)
-    h, w = img_array.shape[:2]
+    async def run(self, fn, *args, **kwargs):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ServerBusyError(f"Server busy: {self.name} queue is full, please retry")
 
-    # Sample border pixels (top/bottom 5% of rows, left/right 5% of cols)
-    border_size = max(int(min(h, w) * 0.05), 1)
-    border_pixels = np.concatenate([
-        img_array[:border_size, :].reshape(-1, 3),     # top
-        img_array[-border_size:, :].reshape(-1, 3),    # bottom
-        img_array[:, :border_size].reshape(-1, 3),     # left
-        img_array[:, -border_size:].reshape(-1, 3),    # right
-    ])
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected
+        }
 
-    # Background color = median of border pixels (robust to outliers)
-    bg_color = np.median(border_pixels, axis=0)
 
-    # Mask: pixels that differ from background by more than threshold
-    diff = np.sqrt(np.sum((img_array - bg_color) ** 2, axis=2))
-    mask = diff > 40  # color distance threshold
+def _create_preprocess_executor():
+    """Thread pool by default; 'process' sidesteps the GIL for large uploads"""
+    if PREPROCESS_EXECUTOR == "process" and not _IN_SPAWNED_WORKER:
+        # Workers run preprocessing._preprocess_image (PIL and NumPy). Under uvicorn's CLI
+        # they never import this module; when it is the launch script they re-import it
+        # as __mp_main__, which skips TensorFlow (see _IN_SPAWNED_WORKER)
+        return ProcessPoolExecutor(
+            max_workers=PREPROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS, thread_name_prefix="preprocess")
 
-    # Find rows and columns with foreground pixels
-    rows = np.any(mask, axis=1)
-    cols = np.any(mask, axis=0)
 
-    if not rows.any() or not cols.any():
-        return image, False
+# TF releases the GIL during inference, so threads are enough for model.predict
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+preprocess_pool = BoundedExecutor(
+    "preprocessing", _create_preprocess_executor(), PREPROCESS_WORKERS, PREPROCESS_MAX_PENDING
+)
+
 
-    row_indices = np.where(rows)[0]
-    col_indices = np.where(cols)[0]
+class MicroBatcher:
+    """
+    Request queue for one variety's model.
+    Waits up to max_wait_ms for concurrent requests to join (or until
+    max_batch_size images are queued), runs a single model.predict on the
+    stacked batch, and hands each caller back only its own prediction.
+    """
 
-    min_row, max_row = int(row_indices[0]), int(row_indices[-1])
-    min_col, max_col = int(col_indices[0]), int(col_indices[-1])
+    def __init__(self, variety, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.variety = variety
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.pending = []  # (image_array, future) pairs waiting for a batch
+        self.has_items = asyncio.Event()
+        self.batch_full = asyncio.Event()
+        self.worker = None
+
+    async def predict(self, image_array):
+        """Queue a 1xHxWx3 array (the model's input size) and wait for its predicted days"""
+        outputs = await self.predict_outputs(image_array)
+        return float(outputs[0])
+
+    async def predict_outputs(self, image_array):
+        """Like predict(), but returns every output head (one value per head)"""
+        if len(self.pending) >= BATCH_MAX_QUEUE:
+            raise ServerBusyError(f"Server busy: '{self.variety}' model queue is full, please retry")
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((image_array, future))
+        self.has_items.set()
+        if len(self.pending) >= self.max_batch_size:
+            self.batch_full.set()
+
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+
+        return await future
+
+    async def _run(self):
+        """Drain the queue one batch at a time (one forward pass in flight per model)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.has_items.wait()
+
+            # Give concurrent requests a short window to join this batch
+            if len(self.pending) < self.max_batch_size and self.max_wait > 0:
+                self.batch_full.clear()
+                try:
+                    await asyncio.wait_for(self.batch_full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            items = self.pending[:self.max_batch_size]
+            del self.pending[:self.max_batch_size]
+            if not self.pending:
+                self.has_items.clear()
+                self.batch_full.clear()
+
+            # Skip callers that disconnected while waiting
+            items = [(array, future) for array, future in items if not future.done()]
+            if not items:
+                continue
+
+            # Any failure (mismatched array shapes, model load, inference) goes to this
+            # batch's callers; raising here would kill the worker and leave them waiting
+            try:
+                batch = np.concatenate([array for array, _ in items], axis=0)
+                model = await model_registry.get(self.variety)
+                predictions = await loop.run_in_executor(
+                    inference_executor, lambda: model.predict(batch)
+                )
+                # Multi-head models return one (n, 1) array per head
+                if isinstance(predictions, (list, tuple)):
+                    predictions = np.concatenate(predictions, axis=1)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
 
-    # Add 5% padding
-    pad_h = int((max_row - min_row) * 0.05)
-    pad_w = int((max_col - min_col) * 0.05)
+            for (_, future), prediction in zip(items, predictions):
+                if not future.done():
+                    future.set_result(prediction)
 
-    min_row = max(0, min_row - pad_h)
-    max_row = min(h, max_row + pad_h)
-    min_col = max(0, min_col - pad_w)
-    max_col = min(w, max_col + pad_w)
 
-    # Only crop if the bounding box is meaningfully smaller than the original
-    crop_area = (max_row - min_row) * (max_col - min_col)
-    total_area = h * w
-    if crop_area >= total_area * 0.85:
-        return image, False
+def get_batcher(variety):
+    """Return the micro-batcher for a variety, creating it on first use"""
+    if variety not in batchers:
+        batchers[variety] = MicroBatcher(variety)
+    return batchers[variety]
 
-    # Scale coordinates back to original image dimensions
-    min_col = int(min_col / scale)
-    min_row = int(min_row / scale)
-    max_col = int(max_col / scale)
-    max_row = int(max_row / scale)
 
-    cropped = image.crop((min_col, min_row, max_col, max_row))
-    return cropped, True
+def _file_digest(path):
+    """Short SHA-256 of a file's contents (identifies a model build across instances)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
 
 
-def normalize_image(image):
+class PredictionCache:
     """
-    Normalize image to reduce domain shift between phone photos and training images.
-    - Applies CLAHE-style equalization on luminance to standardize brightness/contrast
-    - Applies white balance correction to neutralize color casts
-    Returns normalized PIL Image.
+    LRU cache of predictions keyed by image content, variety, preprocessing
+    options and model version. Entries expire after ttl seconds.
+    With db_path set, a SQLite table backs the in-memory LRU so processes on
+    the same host sharing the file also share hits (local disk only).
     """
-    img_array = np.array(image, dtype=np.float32)
-
-    # 1. White balance: scale each channel so the 95th percentile becomes ~240
-    #    This corrects warm/cool color casts from different lighting
-    for c in range(3):
-        channel = img_array[:, :, c]
-        p95 = np.percentile(channel, 95)
-        if p95 > 0:
-            scale = 240.0 / p95
-            img_array[:, :, c] = np.clip(channel * scale, 0, 255)
-
-    # 2. Histogram equalization on luminance (preserve color, fix brightness/contrast)
-    #    Convert to LAB-like: extract luminance, equalize, recombine
-    image_wb = Image.fromarray(img_array.astype(np.uint8))
-    image_gray = image_wb.convert('L')
-    equalized_gray = ImageOps.equalize(image_gray)
-
-    # Blend: use equalized luminance but keep original colors
-    # Scale each pixel's RGB by (equalized_lum / original_lum)
-    orig_lum = np.array(image_gray, dtype=np.float32) + 1  # avoid /0
-    eq_lum = np.array(equalized_gray, dtype=np.float32) + 1
-    lum_ratio = eq_lum / orig_lum
-
-    # Apply gently - 40% equalization to avoid destroying color info
-    blend = 0.4
-    gentle_ratio = 1.0 + blend * (lum_ratio - 1.0)
-
-    result = np.array(image_wb, dtype=np.float32)
-    for c in range(3):
-        result[:, :, c] = np.clip(result[:, :, c] * gentle_ratio, 0, 255)
-
-    return Image.fromarray(result.astype(np.uint8))
-
-
-def preprocess_image(image_bytes, crop=True, normalize=True):
-    """Preprocess uploaded image for prediction"""
-    try:
-        # Open image
-        image = Image.open(io.BytesIO(image_bytes))
-        image = image.convert('RGB')
 
-        # Auto-crop apple from background if requested
-        was_cropped = False
-        if crop:
-            image, was_cropped = auto_crop_apple(image)
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL, db_path=None):
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        self.db_lock = threading.Lock()
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_used REAL)"
+            )
+            self.db.commit()
+
+    @staticmethod
+    def make_key(image_bytes, variety, crop, normalize):
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        # Every setting that changes the preprocessed pixels, so a cache DB never
+        # serves a prediction made with different decode/crop/normalize settings
+        options = (f"crop={int(bool(crop))},normalize={int(bool(normalize))}:{NORMALIZE_MODE}"
+                   f",proxy={NORMALIZE_PROXY_SIZE},fast_decode={int(FAST_DECODE)},crop_min={CROP_MIN_FRACTION}")
+        return f"{image_hash}:{variety}:{options}:{model_versions.get(variety, 'unknown')}"
+
+    async def get(self, key):
+        if self.max_entries == 0:
+            return None
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.entries[key]
+
+        if self.db is not None:
+            row = await asyncio.to_thread(self._db_get, key)
+            if row is not None:
+                # Keep the stored expiry so a DB hit doesn't outlive the original TTL
+                expires_at, value = row
+                self._remember(key, value, expires_at)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def put(self, key, value):
+        if self.max_entries == 0:
+            return
+        self._remember(key, value)
+        if self.db is not None:
+            await asyncio.to_thread(self._db_put, key, value)
+
+    def _remember(self, key, value, expires_at=None):
+        if expires_at is None:
+            expires_at = time.time() + self.ttl
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _db_get(self, key):
+        now = time.time()
+        with self.db_lock:
+            row = self.db.execute(
+                "SELECT expires_at, value FROM predictions WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE predictions SET last_used = ? WHERE key = ?", (now, key))
+            self.db.commit()
+        return row[0], json.loads(row[1])
+
+    def _db_put(self, key, value):
+        now = time.time()
+        with self.db_lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl, now)
+            )
+            # Drop expired rows, then least recently used rows past the size limit
+            self.db.execute("DELETE FROM predictions WHERE expires_at <= ?", (now,))
+            self.db.execute(
+                "DELETE FROM predictions WHERE key NOT IN "
+                "(SELECT key FROM predictions ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self.db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "shared_backend": "sqlite" if self.db is not None else None
+        }
 
-        # Normalize to reduce domain shift (phone vs training images)
-        was_normalized = False
-        if normalize:
-            image = normalize_image(image)
-            was_normalized = True
 
-        # Resize to model input size
-        image = image.resize((224, 224))
+prediction_cache = PredictionCache(db_path=None if _IN_SPAWNED_WORKER else (PREDICTION_CACHE_DB or None))
 
-        # Convert to array and scale to 0-1
-        image_array = np.array(image) / 255.0
-        image_array = np.expand_dims(image_array, axis=0)
 
-        return image_array, was_cropped, was_normalized
+class RequestCapture:
+    """
+    Sampled capture of raw uploads for debugging.
+    The request path only does a random draw and a non-blocking queue put;
+    a daemon thread writes each upload (plus a small JSON sidecar) into one
+    of max_files ring-buffer slots and deletes captures older than max_age.
+    Uploads are dropped, never waited on, when the queue is full.
+    """
+
+    def __init__(self, sample_rate=CAPTURE_SAMPLE_RATE, directory=CAPTURE_DIR,
+                 max_files=CAPTURE_MAX_FILES, max_age_hours=CAPTURE_MAX_AGE_HOURS,
+                 queue_size=CAPTURE_QUEUE_SIZE):
+        self.sample_rate = sample_rate
+        self.directory = Path(directory)
+        self.max_files = max(1, max_files)
+        self.max_age = max_age_hours * 3600
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.writer = None
+        self.next_slot = None
+        self.captured = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def maybe_capture(self, image_bytes, content_type, **info):
+        """Queue the upload for capture with probability sample_rate"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        with self.lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop, name="request-capture", daemon=True)
+                self.writer.start()
+        try:
+            self.queue.put_nowait((image_bytes, content_type, time.time(), info))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.next_slot = self._resume_slot()
+        while True:
+            image_bytes, content_type, received_at, info = self.queue.get()
+            try:
+                self._write(image_bytes, content_type, received_at, info)
+                self._prune()
+                self.captured += 1
+            except Exception as e:
+                print(f"⚠️  Request capture failed: {e}")
+
+    def _resume_slot(self):
+        """Continue the ring after the most recent capture from a previous run"""
+        sidecars = sorted(self.directory.glob("capture_*.json"), key=lambda p: p.stat().st_mtime)
+        if not sidecars:
+            return 0
+        try:
+            return (int(sidecars[-1].stem.split('_')[1]) + 1) % self.max_files
+        except (IndexError, ValueError):
+            return 0
+
+    def _write(self, image_bytes, content_type, received_at, info):
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % self.max_files
+        stem = f"capture_{slot:03d}"
+
+        # Replace whatever previously lived in this slot
+        for old in self.directory.glob(f"{stem}.*"):
+            old.unlink(missing_ok=True)
+
+        extension = mimetypes.guess_extension(content_type or '') or '.bin'
+        (self.directory / f"{stem}{extension}").write_bytes(image_bytes)
+        with open(self.directory / f"{stem}.json", 'w') as f:
+            json.dump({
+                'received_at': received_at,
+                'content_type': content_type,
+                'bytes': len(image_bytes),
+                **info
+            }, f, indent=2)
+
+    def _prune(self):
+        cutoff = time.time() - self.max_age
+        for path in self.directory.glob("capture_*"):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+
+    def stats(self):
+        return {
+            "sample_rate": self.sample_rate,
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize()
+        }
+
+
+request_capture = RequestCapture()
+
+
+def preprocess_image(image_bytes, crop=True, normalize=True, size=(MODEL_INPUT_SIZE, MODEL_INPUT_SIZE)):
+    """Preprocess uploaded image for prediction at a model's (height, width) input size"""
+    try:
+        return _preprocess_image(image_bytes, crop=crop, normalize=normalize, size=size)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
+
+
+async def preprocess_image_async(image_bytes, crop=True, normalize=True, size=(MODEL_INPUT_SIZE, MODEL_INPUT_SIZE)):
+    """Run preprocess_image on the bounded preprocessing pool"""
+    try:
+        return await preprocess_pool.run(_preprocess_image, image_bytes, crop, normalize, size=size)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
 
 @app.get("/")
 async def root():
     """API info"""
-    available_models = list(models.keys())
+    available_models = model_registry.keys()
     return {
         "name": "Apple Oxidation Days Prediction API - Variety Specific",
         "version": "4.0",
@@ -263,16 +1011,103 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check: answers as soon as the server is up, even while models load"""
+    if startup_state["ready"]:
+        status = "healthy" if len(model_registry) > 0 else "no_models_loaded"
+    else:
+        status = "startup_failed" if startup_state["error"] else "starting"
     return {
-        "status": "healthy" if len(models) > 0 else "no_models_loaded",
-        "models_loaded": list(models.keys()),
-        "metadata": {k: v for k, v in metadata_store.items()}
+        "status": status,
+        "startup": startup_state,
+        "models_loaded": [v for v in model_registry.resident if v in model_registry],
+        "models_available": model_registry.keys(),
+        "models": model_registry.stats(),
+        "metadata": {k: v for k, v in metadata_store.items()},
+        "workers": {
+            "preprocessing": preprocess_pool.stats(),
+            "inference": {"workers": INFERENCE_WORKERS},
+            "batch_queues": {v: len(b.pending) for v, b in batchers.items()}
+        },
+        "prediction_cache": prediction_cache.stats(),
+        "request_capture": request_capture.stats()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check for startup probes: 200 once models are loaded and warmed up, else 503"""
+    if not startup_state["ready"]:
+        return JSONResponse(status_code=503, content=startup_state)
+    return {**startup_state, "models": model_registry.stats()}
+
+
+def require_ready():
+    """Prediction endpoints answer 503 + Retry-After until startup has finished"""
+    if not startup_state["ready"]:
+        raise ServerBusyError(f"Server is starting up ({startup_state['stage']}), please retry")
+
 # Valid variety options
 VALID_VARIETIES = ['combined', 'gala', 'smith', 'red_delicious']
 
+
+def describe_prediction(predicted_days, metadata):
+    """Confidence interval and human-readable interpretation for a prediction"""
+    # Calculate confidence interval based on validation MAE
+    mae = metadata.get('validation_mae', 0.5)
+    confidence_interval = {
+        'lower': max(0, predicted_days - mae),
+        'upper': predicted_days + mae
+    }
+
+    # Interpretation
+    if predicted_days < 0.5:
+        interpretation = "Fresh - just cut"
+        oxidation_level = "none"
+    elif predicted_days < 1.5:
+        interpretation = "Very fresh - less than 1.5 days old"
+        oxidation_level = "minimal"
+    elif predicted_days < 2.5:
+        interpretation = "Light oxidation - about 2 days old"
+        oxidation_level = "light"
+    elif predicted_days < 3.5:
+        interpretation = "Medium oxidation - about 3 days old"
+        oxidation_level = "medium"
+    elif predicted_days < 4.5:
+        interpretation = "Significant oxidation - about 4 days old"
+        oxidation_level = "medium-heavy"
+    else:
+        interpretation = f"Heavy oxidation - {predicted_days:.1f} days old"
+        oxidation_level = "heavy"
+
+    return {
+        "days_since_cut": round(predicted_days, 2),
+        "confidence_interval": {
+            "lower": round(confidence_interval['lower'], 2),
+            "upper": round(confidence_interval['upper'], 2)
+        },
+        "interpretation": interpretation,
+        "oxidation_level": oxidation_level
+    }
+
+
+def build_analysis_response(predicted_days, variety, crop, normalize, was_cropped, was_normalized):
+    """/analyze response body"""
+    metadata = metadata_store.get(variety, {})
+    return {
+        "success": True,
+        "prediction": describe_prediction(predicted_days, metadata),
+        "model_info": {
+            "variety_used": variety,
+            "validation_mae": metadata.get('validation_mae'),
+            "training_samples": metadata.get('training_samples')
+        },
+        "preprocessing": {
+            "auto_crop_requested": crop,
+            "was_cropped": was_cropped,
+            "normalize_requested": normalize,
+            "was_normalized": was_normalized
+        }
+    }
+
 @app.post("/analyze")
 async def analyze_apple(
     file: UploadFile = File(...),
@@ -296,6 +1131,8 @@ async def analyze_apple(
     - model_used: Which variety model was used
     """
 
+    require_ready()
+
     # Validate variety
     variety = variety.lower()
     if variety not in VALID_VARIETIES:
@@ -305,8 +1142,8 @@ async def analyze_apple(
         )
 
     # Check if model is loaded
-    if variety not in models:
-        available = list(models.keys())
+    if variety not in model_registry:
+        available = model_registry.keys()
         raise HTTPException(
             status_code=503,
             detail=f"Model '{variety}' not loaded. Available models: {available}"
@@ -320,71 +1157,143 @@ async def analyze_apple(
         # Read and preprocess image
         image_bytes = await file.read()
 
-        # Debug: save received image to inspect what the phone sends
-        debug_img = Image.open(io.BytesIO(image_bytes))
-        debug_img.save(BASE_DIR / "debug_last_received.jpg")
-        print(f"📸 DEBUG: Received image {debug_img.size}, {len(image_bytes)} bytes, type={file.content_type}")
-
-        image_array, was_cropped, was_normalized = preprocess_image(image_bytes, crop=crop, normalize=normalize)
-
-        # Make prediction using selected model
-        model = models[variety]
-        metadata = metadata_store.get(variety, {})
-        
-        prediction = model.predict(image_array, verbose=0)
-        predicted_days = float(prediction[0][0])
-        
-        # Calculate confidence interval based on validation MAE
-        mae = metadata.get('validation_mae', 0.5)
-        confidence_interval = {
-            'lower': max(0, predicted_days - mae),
-            'upper': predicted_days + mae
-        }
-        
-        # Interpretation
-        if predicted_days < 0.5:
-            interpretation = "Fresh - just cut"
-            oxidation_level = "none"
-        elif predicted_days < 1.5:
-            interpretation = "Very fresh - less than 1.5 days old"
-            oxidation_level = "minimal"
-        elif predicted_days < 2.5:
-            interpretation = "Light oxidation - about 2 days old"
-            oxidation_level = "light"
-        elif predicted_days < 3.5:
-            interpretation = "Medium oxidation - about 3 days old"
-            oxidation_level = "medium"
-        elif predicted_days < 4.5:
-            interpretation = "Significant oxidation - about 4 days old"
-            oxidation_level = "medium-heavy"
-        else:
-            interpretation = f"Heavy oxidation - {predicted_days:.1f} days old"
-            oxidation_level = "heavy"
-        
-        return {
-            "success": True,
-            "prediction": {
-                "days_since_cut": round(predicted_days, 2),
-                "confidence_interval": {
-                    "lower": round(confidence_interval['lower'], 2),
-                    "upper": round(confidence_interval['upper'], 2)
-                },
-                "interpretation": interpretation,
-                "oxidation_level": oxidation_level
-            },
-            "model_info": {
-                "variety_used": variety,
+        # Repeated upload? Skip decode, preprocessing and inference entirely
+        cache_key = PredictionCache.make_key(image_bytes, variety, crop, normalize)
+        cached = await prediction_cache.get(cache_key)
+        if cached is not None:
+            return build_analysis_response(
+                cached['days'], variety, crop, normalize, cached['was_cropped'], cached['was_normalized']
+            )
+
+        # Sampled capture of what the phone sends (written in the background)
+        request_capture.maybe_capture(
+            image_bytes, file.content_type, endpoint="/analyze", variety=variety, crop=crop, normalize=normalize
+        )
+
+        image_array, was_cropped, was_normalized = await preprocess_image_async(
+            image_bytes, crop=crop, normalize=normalize, size=await model_registry.input_size(variety)
+        )
+
+        # Make prediction using selected model (batched with concurrent requests)
+        predicted_days = await get_batcher(variety).predict(image_array)
+
+        await prediction_cache.put(cache_key, {
+            'days': predicted_days,
+            'was_cropped': was_cropped,
+            'was_normalized': was_normalized
+        })
+
+        return build_analysis_response(predicted_days, variety, crop, normalize, was_cropped, was_normalized)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing image: {str(e)}")
+
+@app.post("/analyze_all")
+async def analyze_all(
+    file: UploadFile = File(...),
+    crop: Optional[bool] = Query(False, description="Auto-crop apple from background before analysis"),
+    normalize: Optional[bool] = Query(True, description="Normalize image brightness/color to reduce domain shift from phone photos")
+):
+    """
+    Analyze one apple photo with every loaded model
+
+    The image is preprocessed once per model input size (once when every model
+    takes 224x224) and sent to all variety models concurrently. Returns each model's prediction plus an
+    ensemble summary (mean across models and how much they disagree).
+    """
+    require_ready()
+    if not len(model_registry):
+        raise HTTPException(status_code=503, detail="No models loaded")
+
+    # Validate file type
+    if not file.content_type.startswith('image/'):
+        raise HTTPException(status_code=400, detail="File must be an image")
+
+    try:
+        image_bytes = await file.read()
+        fused_varieties = metadata_store['fused']['varieties'] if 'fused' in model_registry.internal else []
+        varieties = [v for v in VALID_VARIETIES if v in model_registry or v in fused_varieties]
+
+        # Only varieties without a cached prediction need the image preprocessed
+        cache_keys = {v: PredictionCache.make_key(image_bytes, v, crop, normalize) for v in varieties}
+        results = {}
+        for variety in varieties:
+            cached = await prediction_cache.get(cache_keys[variety])
+            if cached is not None:
+                results[variety] = cached
+
+        missing = [v for v in varieties if v not in results]
+        if missing:
+            request_capture.maybe_capture(
+                image_bytes, file.content_type, endpoint="/analyze_all", crop=crop, normalize=normalize
+            )
+
+            if fused_varieties:
+                # One forward pass through the fused model gives every head
+                image_array, was_cropped, was_normalized = await preprocess_image_async(
+                    image_bytes, crop=crop, normalize=normalize, size=await model_registry.input_size('fused')
+                )
+                outputs = await get_batcher('fused').predict_outputs(image_array)
+                by_variety = dict(zip(fused_varieties, (float(x) for x in outputs)))
+                prepared = {v: (was_cropped, was_normalized) for v in missing}
+                predictions = [by_variety[v] for v in missing]
+            else:
+                # Preprocess once per model input size, then fan out to every model at once
+                sizes = dict(zip(missing, await asyncio.gather(*(model_registry.input_size(v) for v in missing))))
+                distinct = sorted(set(sizes.values()))
+                arrays = dict(zip(distinct, await asyncio.gather(*(
+                    preprocess_image_async(image_bytes, crop=crop, normalize=normalize, size=size) for size in distinct
+                ))))
+                prepared = {v: arrays[sizes[v]][1:] for v in missing}
+                predictions = await asyncio.gather(*(get_batcher(v).predict(arrays[sizes[v]][0]) for v in missing))
+
+            for variety, predicted_days in zip(missing, predictions):
+                was_cropped, was_normalized = prepared[variety]
+                results[variety] = {
+                    'days': predicted_days,
+                    'was_cropped': was_cropped,
+                    'was_normalized': was_normalized
+                }
+                await prediction_cache.put(cache_keys[variety], results[variety])
+
+        per_model = {}
+        for variety in varieties:
+            metadata = metadata_store.get(variety, {})
+            per_model[variety] = {
+                **describe_prediction(results[variety]['days'], metadata),
                 "validation_mae": metadata.get('validation_mae'),
                 "training_samples": metadata.get('training_samples')
+            }
+
+        days = [results[v]['days'] for v in varieties]
+        maes = [metadata_store[v]['validation_mae'] for v in varieties
+                if 'validation_mae' in metadata_store.get(v, {})]
+        ensemble_days = float(np.mean(days))
+        ensemble_metadata = {'validation_mae': float(np.mean(maes))} if maes else {}
+        first = results[varieties[0]]
+
+        return {
+            "success": True,
+            "predictions": per_model,
+            "ensemble": {
+                **describe_prediction(ensemble_days, ensemble_metadata),
+                "min_days": round(min(days), 2),
+                "max_days": round(max(days), 2),
+                "spread": round(max(days) - min(days), 2),
+                "models_used": varieties
             },
             "preprocessing": {
                 "auto_crop_requested": crop,
-                "was_cropped": was_cropped,
+                "was_cropped": first['was_cropped'],
                 "normalize_requested": normalize,
-                "was_normalized": was_normalized
+                "was_normalized": first['was_normalized']
             }
         }
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing image: {str(e)}")
 
@@ -401,6 +1310,8 @@ async def batch_analyze(
     Useful for comparing oxidation progression
     """
 
+    require_ready()
+
     # Validate variety
     variety = variety.lower()
     if variety not in VALID_VARIETIES:
@@ -409,37 +1320,99 @@ async def batch_analyze(
             detail=f"Invalid variety. Must be one of {VALID_VARIETIES}"
         )
 
-    if variety not in models:
-        available = list(models.keys())
+    if variety not in model_registry:
+        available = model_registry.keys()
         raise HTTPException(
             status_code=503,
             detail=f"Model '{variety}' not loaded. Available models: {available}"
         )
 
-    model = models[variety]
-    results = []
+    model = await model_registry.get(variety)
+    size = model.input_size
 
-    for file in files:
-        try:
-            image_bytes = await file.read()
-            image_array, was_cropped, was_normalized = preprocess_image(image_bytes, crop=crop, normalize=normalize)
+    # Decode/preprocess all uploads concurrently (at most one job per worker so a
+    # large batch doesn't trip the preprocessing queue limit for other requests)
+    preprocess_slots = asyncio.Semaphore(PREPROCESS_WORKERS)
 
-            prediction = model.predict(image_array, verbose=0)
-            predicted_days = float(prediction[0][0])
+    async def prepare(file):
+        """Cached prediction, or the preprocessed array still waiting for one"""
+        image_bytes = await file.read()
+        cache_key = PredictionCache.make_key(image_bytes, variety, crop, normalize)
+        cached = await prediction_cache.get(cache_key)
+        if cached is not None:
+            return {"key": cache_key, "array": None, **cached}
+
+        async with preprocess_slots:
+            image_array, was_cropped, was_normalized = await preprocess_image_async(
+                image_bytes, crop=crop, normalize=normalize, size=size
+            )
+        return {
+            "key": cache_key,
+            "array": image_array,
+            "days": None,
+            "was_cropped": was_cropped,
+            "was_normalized": was_normalized
+        }
 
-            results.append({
-                "filename": file.filename,
-                "days_since_cut": round(predicted_days, 2),
-                "was_cropped": was_cropped,
-                "success": True
+    async def predict_chunk(prepared):
+        """One forward pass for every uncached image in the chunk (fills in 'days')"""
+        pending = [p for p in prepared if not isinstance(p, Exception) and p["days"] is None]
+        if not pending:
+            return
+        batch = np.concatenate([p["array"] for p in pending], axis=0)
+        loop = asyncio.get_running_loop()
+        predictions = await loop.run_in_executor(
+            inference_executor, lambda: model.predict(batch)
+        )
+        for item, prediction in zip(pending, predictions):
+            item["days"] = float(prediction[0])
+            item["array"] = None
+            await prediction_cache.put(item["key"], {
+                "days": item["days"],
+                "was_cropped": item["was_cropped"],
+                "was_normalized": item["was_normalized"]
             })
+
+    prepare_tasks = [asyncio.create_task(prepare(file)) for file in files]
+
+    # Pipeline: each chunk's forward pass starts as soon as its images are ready,
+    # while later chunks are still being preprocessed
+    chunks = []
+    for start in range(0, len(files), BATCH_ANALYZE_CHUNK_SIZE):
+        prepared = await asyncio.gather(
+            *prepare_tasks[start:start + BATCH_ANALYZE_CHUNK_SIZE], return_exceptions=True
+        )
+        chunks.append((prepared, asyncio.create_task(predict_chunk(prepared))))
+
+    results = []
+    file_iter = iter(files)
+    for prepared, predict_task in chunks:
+        try:
+            await predict_task
+            chunk_error = None
         except Exception as e:
+            chunk_error = e
+
+        for item in prepared:
+            file = next(file_iter)
+            error = item if isinstance(item, Exception) else None
+            if error is None and item["days"] is None:
+                error = chunk_error
+            if error is not None:
+                results.append({
+                    "filename": file.filename,
+                    "error": error.detail if isinstance(error, HTTPException) else str(error),
+                    "success": False
+                })
+                continue
+
             results.append({
                 "filename": file.filename,
-                "error": str(e),
-                "success": False
+                "days_since_cut": round(item["days"], 2),
+                "was_cropped": item["was_cropped"],
+                "success": True
             })
-    
+
     return {
         "total_files": len(files),
         "successful": sum(1 for r in results if r["success"]),
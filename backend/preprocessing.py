@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Image preprocessing for the Apple Oxidation API: decode, auto-crop, normalize, resize.
+Only PIL and NumPy - no TensorFlow or API state - so PREPROCESS_EXECUTOR=process
+workers can import it cheaply.
+"""
+
+import io
+import os
+import math
+import numpy as np
+from PIL import Image
+
+# Fast JPEG decode: phone JPEGs are DCT-scaled (1/2, 1/4 or 1/8) while decoding,
+# to the smallest size that still has enough pixels for crop + model-input resize.
+# Set FAST_DECODE=0 to always decode at full resolution.
+FAST_DECODE = os.environ.get("FAST_DECODE", "1") == "1"
+# Default model input; models trained at another --image-size get uploads resized
+# straight to their own input size
+MODEL_INPUT_SIZE = 224
+# Smallest fraction of the frame's short side an auto-cropped apple is expected to fill
+CROP_MIN_FRACTION = float(os.environ.get("CROP_MIN_FRACTION", "0.4"))
+
+# NORMALIZE_MODE=fast computes normalization statistics on a NORMALIZE_PROXY_SIZE
+# proxy and applies them after the model-input resize (see validate_fast_normalize.py)
+NORMALIZE_MODE = os.environ.get("NORMALIZE_MODE", "full").lower()
+NORMALIZE_PROXY_SIZE = int(os.environ.get("NORMALIZE_PROXY_SIZE", "256"))
+
+
+def auto_crop_apple(image):
+    """
+    Auto-crop apple from background by detecting the foreground object.
+    Samples the image border to determine background color, then finds
+    regions that differ from it. Works with any background color.
+    Returns (cropped_image, was_cropped) tuple.
+    """
+    orig_w, orig_h = image.size
+
+    # Downscale for analysis to save memory (full-res images can be 5000x3000+)
+    max_analysis_dim = 512
+    if max(orig_w, orig_h) > max_analysis_dim:
+        scale = max_analysis_dim / max(orig_w, orig_h)
+        analysis_img = image.resize((int(orig_w * scale), int(orig_h * scale)))
+    else:
+        scale = 1.0
+        analysis_img = image
+
+    img_array = np.array(analysis_img, dtype=np.float32)
+    h, w = img_array.shape[:2]
+
+    # Sample border pixels (top/bottom 5% of rows, left/right 5% of cols)
+    border_size = max(int(min(h, w) * 0.05), 1)
+    border_pixels = np.concatenate([
+        img_array[:border_size, :].reshape(-1, 3),     # top
+        img_array[-border_size:, :].reshape(-1, 3),    # bottom
+        img_array[:, :border_size].reshape(-1, 3),     # left
+        img_array[:, -border_size:].reshape(-1, 3),    # right
+    ])
+
+    # Background color = median of border pixels (robust to outliers)
+    bg_color = np.median(border_pixels, axis=0)
+
+    # Mask: pixels that differ from background by more than threshold
+    diff = np.sqrt(np.sum((img_array - bg_color) ** 2, axis=2))
+    mask = diff > 40  # color distance threshold
+
+    # Find rows and columns with foreground pixels
+    rows = np.any(mask, axis=1)
+    cols = np.any(mask, axis=0)
+
+    if not rows.any() or not cols.any():
+        return image, False
+
+    row_indices = np.where(rows)[0]
+    col_indices = np.where(cols)[0]
+
+    min_row, max_row = int(row_indices[0]), int(row_indices[-1])
+    min_col, max_col = int(col_indices[0]), int(col_indices[-1])
+
+    # Add 5% padding
+    pad_h = int((max_row - min_row) * 0.05)
+    pad_w = int((max_col - min_col) * 0.05)
+
+    min_row = max(0, min_row - pad_h)
+    max_row = min(h, max_row + pad_h)
+    min_col = max(0, min_col - pad_w)
+    max_col = min(w, max_col + pad_w)
+
+    # Only crop if the bounding box is meaningfully smaller than the original
+    crop_area = (max_row - min_row) * (max_col - min_col)
+    total_area = h * w
+    if crop_area >= total_area * 0.85:
+        return image, False
+
+    # Scale coordinates back to original image dimensions
+    min_col = int(min_col / scale)
+    min_row = int(min_row / scale)
+    max_col = int(max_col / scale)
+    max_row = int(max_row / scale)
+
+    cropped = image.crop((min_col, min_row, max_col, max_row))
+    return cropped, True
+
+
+def _histogram_percentile(hist, q):
+    """
+    np.percentile(values, q) for integer values given as a 256-bin histogram.
+    Mirrors NumPy's default 'linear' method step by step so the result is identical.
+    """
+    n = int(hist.sum())
+    quantile = q / 100.0
+    virtual_index = n * quantile + (1 + quantile * -1) - 1
+    lower = math.floor(virtual_index)
+    gamma = virtual_index - lower
+
+    # Value at sorted position k = first level whose cumulative count exceeds k
+    cumulative = np.cumsum(hist)
+    lo = float(np.searchsorted(cumulative, min(lower, n - 1), side='right'))
+    hi = float(np.searchsorted(cumulative, min(lower + 1, n - 1), side='right'))
+
+    diff = hi - lo
+    if gamma >= 0.5:
+        return hi - diff * (1 - gamma)
+    return lo + diff * gamma
+
+
+def _white_balance_lut(histogram):
+    """
+    Per-channel lookup table (from an RGB image.histogram()) that scales each
+    channel so its 95th percentile becomes ~240. Returns a flat 768-entry list
+    for Image.point().
+    """
+    levels = np.arange(256, dtype=np.float32)
+    lut = np.empty((3, 256), dtype=np.uint8)
+    for c in range(3):
+        hist = np.asarray(histogram[c * 256:(c + 1) * 256])
+        p95 = _histogram_percentile(hist, 95)
+        if p95 > 0:
+            scale = np.float64(240.0 / p95)
+            lut[c] = np.clip(levels * scale, 0, 255).astype(np.float32).astype(np.uint8)
+        else:
+            lut[c] = levels.astype(np.uint8)
+    return lut.ravel().tolist()
+
+
+def _equalize_lut(histogram):
+    """ImageOps.equalize's lookup table, computed from a luminance histogram"""
+    hist = np.asarray(histogram)
+    used = hist[hist > 0]
+    identity = np.arange(256)
+    if len(used) <= 1:
+        return identity
+    step = (int(used.sum()) - int(used[-1])) // 255
+    if not step:
+        return identity
+    counts_before = np.concatenate(([0], np.cumsum(hist)[:-1]))
+    return np.clip((step // 2 + counts_before) // step, 0, 255)
+
+
+def _blend_table(eq_lut, blend=0.4):
+    """
+    Fused (luminance, channel value) -> output table, shape (256, 256) uint8.
+    Each pixel's RGB is scaled by a gentle blend of equalized/original luminance;
+    the float32 arithmetic matches the per-pixel formulation exactly.
+    """
+    levels = np.arange(256, dtype=np.float32)
+    orig_lum = levels + 1  # avoid /0
+    eq_lum = eq_lut.astype(np.float32) + 1
+    lum_ratio = eq_lum / orig_lum
+    gentle_ratio = 1.0 + blend * (lum_ratio - 1.0)
+    table = np.clip(gentle_ratio[:, None] * levels[None, :], 0, 255)
+    return table.astype(np.uint8)
+
+
+def _apply_blend_table(wb_array, lum, table):
+    """out[y, x, c] = table[lum[y, x], wb_array[y, x, c]] as a single uint8 gather"""
+    index = (lum.astype(np.uint16) << 8)[:, :, None] + wb_array
+    return np.take(table.ravel(), index)
+
+
+def normalize_image(image):
+    """
+    Normalize image to reduce domain shift between phone photos and training images.
+    - Applies CLAHE-style equalization on luminance to standardize brightness/contrast
+    - Applies white balance correction to neutralize color casts
+    Returns normalized PIL Image.
+
+    Statistics come from histograms and every step is a uint8 lookup table, so
+    there are no percentile sorts or full-size float32 copies. Output is
+    bit-identical to the original percentile/float32 implementation.
+    """
+    # 1. White balance: scale each channel so the 95th percentile becomes ~240
+    #    This corrects warm/cool color casts from different lighting
+    image_wb = image.point(_white_balance_lut(image.histogram()))
+
+    # 2. Histogram equalization on luminance (preserve color, fix brightness/contrast)
+    #    Apply gently - 40% equalization to avoid destroying color info
+    image_gray = image_wb.convert('L')
+    table = _blend_table(_equalize_lut(image_gray.histogram()))
+
+    result = _apply_blend_table(np.asarray(image_wb), np.asarray(image_gray), table)
+    return Image.fromarray(result)
+
+
+def normalization_stats(image):
+    """
+    White-balance LUT and luminance blend table for an image.
+    Pass a downsampled proxy to get the statistics without touching every pixel.
+    """
+    wb_lut = _white_balance_lut(image.histogram())
+    image_gray = image.point(wb_lut).convert('L')
+    return wb_lut, _blend_table(_equalize_lut(image_gray.histogram()))
+
+
+def apply_normalization(image, stats):
+    """Apply statistics from normalization_stats() to an image of any size"""
+    wb_lut, table = stats
+    image_wb = image.point(wb_lut)
+    image_gray = image_wb.convert('L')
+    return Image.fromarray(_apply_blend_table(np.asarray(image_wb), np.asarray(image_gray), table))
+
+
+def _normalization_proxy(image):
+    """Downsampled copy of the image used for fast-mode normalization statistics"""
+    width, height = image.size
+    scale = NORMALIZE_PROXY_SIZE / max(width, height)
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return image.resize(size, Image.Resampling.BOX)
+
+
+def decode_image(image_bytes, min_side=None):
+    """
+    Decode an upload to an RGB PIL Image.
+    If min_side is given and the upload is a JPEG, decode directly at a reduced
+    scale whose short side is still >= min_side (PIL draft mode). PNG, HEIC and
+    other formats fall back to a full decode.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+
+    # MPO is what many phones write: a JPEG with extra embedded frames
+    if min_side and image.format in ('JPEG', 'MPO'):
+        width, height = image.size
+        scale = min_side / min(width, height)
+        if scale < 1:
+            image.draft('RGB', (math.ceil(width * scale), math.ceil(height * scale)))
+
+    return image.convert('RGB')
+
+
+def _decode_min_side(crop, size=(MODEL_INPUT_SIZE, MODEL_INPUT_SIZE)):
+    """Short side needed so the (optionally cropped) image still covers a (height, width) model input"""
+    if crop:
+        return math.ceil(max(size) / CROP_MIN_FRACTION)
+    return max(size)
+
+
+def _preprocess_image(image_bytes, crop=True, normalize=True, normalize_mode=None,
+                      size=(MODEL_INPUT_SIZE, MODEL_INPUT_SIZE)):
+    """
+    Decode, crop, normalize and resize an upload.
+    normalize_mode: 'full' normalizes the cropped image then resizes; 'fast'
+    takes statistics from a small proxy and normalizes at the model input size.
+    Defaults to NORMALIZE_MODE. size is the model's (height, width) input, reached
+    with a single PIL resize like the training photos. Raises plain exceptions so
+    it can run in a worker process.
+    """
+    normalize_mode = normalize_mode or NORMALIZE_MODE
+
+    # Open image (reduced-resolution decode for large JPEGs)
+    image = decode_image(image_bytes, _decode_min_side(crop, size) if FAST_DECODE else None)
+    target = (int(size[1]), int(size[0]))  # PIL sizes are (width, height)
+
+    # Auto-crop apple from background if requested
+    was_cropped = False
+    if crop:
+        image, was_cropped = auto_crop_apple(image)
+
+    # Normalize to reduce domain shift (phone vs training images)
+    was_normalized = False
+    if normalize and normalize_mode == 'fast':
+        stats = normalization_stats(_normalization_proxy(image))
+        image = image.resize(target)
+        image = apply_normalization(image, stats)
+        was_normalized = True
+    elif normalize:
+        image = normalize_image(image)
+        was_normalized = True
+
+    # Resize to model input size (fast normalization already did)
+    if image.size != target:
+        image = image.resize(target)
+
+    # Convert to array and scale to 0-1
+    image_array = np.array(image) / 255.0
+    image_array = np.expand_dims(image_array, axis=0)
+
+    return image_array, was_cropped, was_normalized
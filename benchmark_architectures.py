@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Architecture Benchmark - model size, serving latency and accuracy per variant
+Trains every create_regression_model() architecture / input size combination in
+CONFIGS on each variety (same split and augmentation as train_regression_model.py,
+with early stopping) and reports parameters, .h5 size, CPU latency through the
+API's KerasBackend at batch 1/8/32 and validation MAE. Latency is measured at each
+model's own input size, which the API preprocesses uploads straight to.
+Variants on the latency/MAE Pareto front are marked with ★. Trained models are
+kept in a temporary directory - the served models are not touched.
+
+Usage:
+    python benchmark_architectures.py                   # all varieties (slow: trains every variant)
+    python benchmark_architectures.py gala --epochs 20
+"""
+
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+import numpy as np
+from tensorflow import keras
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+import apple_api_regression as api  # noqa: E402
+from benchmark_inference import time_predict  # noqa: E402
+from train_regression_model import (  # noqa: E402
+    MAX_EPOCHS, EARLY_STOPPING_PATIENCE, AugmentedDataGenerator, collect_training_data, create_regression_model
+)
+
+# (architecture, square input size) variants to compare
+CONFIGS = [
+    ('baseline', 224),
+    ('gap', 224),
+    ('separable', 224),
+    ('gap', 160),
+    ('separable', 160),
+    ('separable', 128),
+]
+
+LATENCY_BATCH_SIZES = [1, 8, 32]
+
+
+def train_variant(variety, architecture, size, epochs, patience, output_dir):
+    """Train one variant; returns (saved model path, validation MAE) or None without data"""
+    images, labels, _ = collect_training_data(None if variety == 'combined' else variety, image_size=(size, size))
+    if len(images) == 0:
+        return None
+    X_train, X_val, y_train, y_val = train_test_split(images, labels, test_size=0.2, random_state=42)
+
+    keras.backend.clear_session()
+    model = create_regression_model(architecture, (size, size))
+    train_gen = AugmentedDataGenerator(X_train, y_train, batch_size=8, augment=True)
+    val_gen = AugmentedDataGenerator(X_val, y_val, batch_size=32, augment=False, shuffle=False)
+    early_stopping = keras.callbacks.EarlyStopping(monitor='val_mae', mode='min', patience=patience,
+                                                   restore_best_weights=True)
+    try:
+        model.fit(train_gen, validation_data=val_gen, epochs=epochs, callbacks=[early_stopping], verbose=2)
+    finally:
+        train_gen.close()
+    _, val_mae = model.evaluate(val_gen, verbose=0)
+
+    model_path = Path(output_dir) / f"{variety}_{architecture}_{size}.h5"
+    model.save(model_path)
+    return model_path, float(val_mae)
+
+
+def latency_ms(backend, batch_size):
+    """Median predict() latency at the model's own input size"""
+    batch = np.random.default_rng(42).random((batch_size, *backend.input_size, 3))
+    return time_predict(backend, batch)
+
+
+def pareto_front(rows):
+    """Rows no other row beats on both batch-1 latency and validation MAE"""
+    front = set()
+    for i, row in enumerate(rows):
+        dominated = any(
+            other['latency_ms'][1] <= row['latency_ms'][1] and other['validation_mae'] <= row['validation_mae']
+            and (other['latency_ms'][1] < row['latency_ms'][1] or other['validation_mae'] < row['validation_mae'])
+            for other in rows
+        )
+        if not dominated:
+            front.add(i)
+    return front
+
+
+def benchmark_variety(variety, epochs, patience, output_dir):
+    print(f"\n{'=' * 70}")
+    print(f"🍎 {variety.upper()}")
+    print(f"{'=' * 70}")
+
+    rows = []
+    for architecture, size in CONFIGS:
+        print(f"\n🏗️  {architecture} @ {size}x{size}")
+        trained = train_variant(variety, architecture, size, epochs, patience, output_dir)
+        if trained is None:
+            print("❌ No training data found - skipped")
+            return []
+        model_path, val_mae = trained
+
+        backend = api.KerasBackend(model_path)
+        rows.append({
+            'architecture': architecture,
+            'size': size,
+            'parameters': backend.model.count_params(),
+            'size_mb': model_path.stat().st_size / 1e6,
+            'latency_ms': {batch_size: latency_ms(backend, batch_size) for batch_size in LATENCY_BATCH_SIZES},
+            'validation_mae': val_mae
+        })
+
+    front = pareto_front(rows)
+    latency_headers = " | ".join(f"{f'b{batch_size} ms':>8s}" for batch_size in LATENCY_BATCH_SIZES)
+    print(f"\n{'Architecture':<12s} | {'Input':>5s} | {'Params':>9s} | {'Size':>7s} | {latency_headers} | "
+          f"{'Val MAE':>7s} | Pareto")
+    print("-" * 90)
+    for i, row in enumerate(rows):
+        latencies = " | ".join(f"{row['latency_ms'][batch_size]:8.1f}" for batch_size in LATENCY_BATCH_SIZES)
+        print(f"{row['architecture']:<12s} | {row['size']:5d} | {row['parameters']:9,d} | {row['size_mb']:5.1f}MB | "
+              f"{latencies} | {row['validation_mae']:7.3f} | {'★' if i in front else ''}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare regression model architectures")
+    parser.add_argument('varieties', nargs='*', default=api.VALID_VARIETIES,
+                        help="Varieties to benchmark (default: all)")
+    parser.add_argument('--epochs', type=int, default=MAX_EPOCHS, help="Maximum training epochs per variant")
+    parser.add_argument('--patience', type=int, default=EARLY_STOPPING_PATIENCE, help="Early stopping patience")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("⚡ ARCHITECTURE BENCHMARK - LATENCY vs ACCURACY")
+    print("=" * 70)
+    print(f"   Variants: {', '.join(f'{arch}@{size}' for arch, size in CONFIGS)}")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for variety in args.varieties:
+            if variety not in api.MODEL_PATHS:
+                print(f"❌ Unknown variety: {variety}")
+                sys.exit(1)
+            benchmark_variety(variety, args.epochs, args.patience, output_dir)
+
+    print("\n   ★ = on the Pareto front (no other variant is both faster at batch 1 and more accurate)")
+    print("   Train the chosen variant with: python train_regression_model.py --architecture gap --image-size 160")
+
+
+if __name__ == "__main__":
+    main()
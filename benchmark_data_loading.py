@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Data Loading Benchmark - parallel photo decoding for training
+Times load_images_parallel() on the second_collection photos (bypassing the
+training image cache) for an increasing number of worker processes and
+reports the speedup over a single process.
+
+Usage:
+    python benchmark_data_loading.py              # every photo
+    python benchmark_data_loading.py 200          # first 200 photos
+"""
+
+import os
+import sys
+import time
+
+from train_regression_model import DATA_DIR, load_images_parallel
+
+
+def worker_counts():
+    """1, 2, 4, ... up to the number of CPUs (always including it)"""
+    cpus = os.cpu_count() or 1
+    counts = []
+    workers = 1
+    while workers < cpus:
+        counts.append(workers)
+        workers *= 2
+    counts.append(cpus)
+    return counts
+
+
+def main():
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    print("\n" + "=" * 70)
+    print("⚡ DATA LOADING BENCHMARK - PARALLEL DECODE")
+    print("=" * 70)
+
+    photo_paths = sorted(DATA_DIR.rglob("*.JPG"))[:limit]
+    if not photo_paths:
+        print(f"❌ No photos found in {DATA_DIR}")
+        sys.exit(1)
+    print(f"   {len(photo_paths)} photos from {DATA_DIR}")
+
+    results = []
+    for workers in worker_counts():
+        print(f"\n🔄 {workers} worker(s)")
+        start = time.perf_counter()
+        images = load_images_parallel(photo_paths, workers)
+        elapsed = time.perf_counter() - start
+        loaded = sum(1 for img_array in images if img_array is not None)
+        results.append((workers, elapsed, loaded))
+
+    baseline = results[0][1]
+    print(f"\n{'Workers':>7s} | {'Time':>8s} | {'Photos/s':>8s} | {'Speedup':>7s} | {'Efficiency':>10s}")
+    print("-" * 55)
+    for workers, elapsed, loaded in results:
+        speedup = baseline / elapsed
+        print(f"{workers:7d} | {elapsed:7.1f}s | {loaded / elapsed:8.1f} | {speedup:6.1f}x | {speedup / workers:9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Generator Workers Benchmark - AugmentedDataGenerator batches/sec vs workers
+Feeds the augmented training generator into a tiny model (so phone_augment is
+the bottleneck, as it is on CPU-only training boxes) and measures batches per
+second with 1, 2, 4, ... worker threads and processes. Uses the cached training
+photos when available, otherwise random images.
+
+Usage:
+    python benchmark_generator_workers.py
+"""
+
+import time
+import numpy as np
+from tensorflow import keras
+
+from train_regression_model import (
+    IMG_HEIGHT, IMG_WIDTH, AugmentedDataGenerator, collect_training_data
+)
+from benchmark_data_loading import worker_counts
+
+BATCH_SIZE = 8
+MAX_IMAGES = 256
+
+
+class EpochTimer(keras.callbacks.Callback):
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.seconds = time.perf_counter() - self.start
+
+
+def load_images():
+    images, labels, _ = collect_training_data()
+    if len(images) == 0:
+        print("⚠️  No training photos found - using random images")
+        rng = np.random.default_rng(42)
+        images = rng.integers(0, 256, (MAX_IMAGES, IMG_HEIGHT, IMG_WIDTH, 3), dtype=np.uint8)
+        labels = rng.uniform(0, 10, MAX_IMAGES)
+    return images[:MAX_IMAGES], labels[:MAX_IMAGES]
+
+
+def tiny_model():
+    model = keras.Sequential([
+        keras.layers.Input(shape=(IMG_HEIGHT, IMG_WIDTH, 3)),
+        keras.layers.GlobalAveragePooling2D(),
+        keras.layers.Dense(1)
+    ])
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+
+def batches_per_second(images, labels, workers, use_multiprocessing):
+    """Throughput of the second epoch (the first one includes worker start-up)"""
+    generator = AugmentedDataGenerator(images, labels, batch_size=BATCH_SIZE, workers=workers,
+                                       use_multiprocessing=use_multiprocessing)
+    timer = EpochTimer()
+    try:
+        tiny_model().fit(generator, epochs=2, verbose=0, callbacks=[timer])
+    finally:
+        generator.close()
+    return len(generator) / timer.seconds
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("⚡ GENERATOR WORKERS BENCHMARK - BATCHES/SEC")
+    print("=" * 70)
+
+    images, labels = load_images()
+    print(f"   {len(images)} images, batch size {BATCH_SIZE}")
+
+    baseline = batches_per_second(images, labels, 1, False)
+    print(f"\n{'Workers':>7s} | {'Mode':>9s} | {'Batches/s':>9s} | {'Speedup':>7s}")
+    print("-" * 45)
+    print(f"{1:7d} | {'serial':>9s} | {baseline:9.1f} | {1.0:6.1f}x")
+    for workers in worker_counts()[1:]:
+        for use_multiprocessing, mode in [(False, 'threads'), (True, 'processes')]:
+            rate = batches_per_second(images, labels, workers, use_multiprocessing)
+            print(f"{workers:7d} | {mode:>9s} | {rate:9.1f} | {rate / baseline:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Inference Benchmark - tf.function buckets vs model.predict
+Times the API's KerasBackend per batch size with its compiled tf.function path
+(KERAS_TF_FUNCTION=1, the default) against plain model.predict, and checks both
+give the same predictions.
+
+Usage:
+    python benchmark_inference.py            # combined model
+    python benchmark_inference.py gala
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+import apple_api_regression as api  # noqa: E402
+
+BATCH_SIZES = [1, 2, 3, 4, 8, 16, 32]
+REPEATS = 20
+
+
+def load_backends(variety):
+    """Compiled and model.predict backends for a variety (an untrained model if none is saved)"""
+    model_path = api.MODEL_PATHS[variety]
+    if not model_path.exists():
+        from train_regression_model import create_regression_model
+        print(f"⚠️  {model_path.name} not found - timing an untrained model with the same architecture")
+        model_path = Path(tempfile.mkdtemp()) / "untrained.h5"
+        create_regression_model().save(model_path)
+    return api.KerasBackend(model_path, compiled=True), api.KerasBackend(model_path, compiled=False)
+
+
+def time_predict(backend, batch):
+    """Median call latency in milliseconds (after one warm-up call)"""
+    backend.predict(batch)
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        backend.predict(batch)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def main():
+    variety = sys.argv[1] if len(sys.argv) > 1 else 'combined'
+    if variety not in api.MODEL_PATHS:
+        print(f"❌ Unknown variety: {variety}")
+        sys.exit(1)
+
+    print("\n" + "=" * 70)
+    print(f"⚡ INFERENCE BENCHMARK - tf.function vs model.predict ({variety})")
+    print("=" * 70)
+
+    compiled, reference = load_backends(variety)
+    rng = np.random.default_rng(42)
+
+    print(f"\n{'Batch':>5s} | {'Bucket':>6s} | {'predict':>9s} | {'tf.function':>11s} | {'Speedup':>7s} | {'Max diff':>8s}")
+    print("-" * 70)
+
+    worst_diff = 0.0
+    for batch_size in BATCH_SIZES:
+        batch = rng.random((batch_size, *compiled.input_size, 3))
+        diff = float(np.abs(np.asarray(compiled.predict(batch)) - np.asarray(reference.predict(batch))).max())
+        worst_diff = max(worst_diff, diff)
+
+        predict_ms = time_predict(reference, batch)
+        compiled_ms = time_predict(compiled, batch)
+        print(f"{batch_size:5d} | {api.batch_bucket(batch_size):6d} | {predict_ms:7.1f}ms | {compiled_ms:9.1f}ms | "
+              f"{predict_ms / compiled_ms:6.1f}x | {diff:8.1e}")
+
+    print("-" * 70)
+    print(f"\n   Traced buckets: {sorted(compiled.functions)}")
+    if worst_diff > 1e-3:
+        print(f"❌ Predictions differ by up to {worst_diff:.2e} days")
+        sys.exit(1)
+    print(f"✅ Predictions match model.predict (max difference {worst_diff:.1e} days)")
+
+
+if __name__ == "__main__":
+    main()
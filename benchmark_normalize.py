@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Normalization Benchmark - LUT normalize_image vs the original implementation
+Checks the API's normalize_image (backend/preprocessing.py) still matches the original percentile/float32
+version pixel for pixel, and times both on real photos (or synthetic ones)
+"""
+
+import sys
+import time
+from pathlib import Path
+import numpy as np
+from PIL import Image, ImageOps
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+from preprocessing import normalize_image  # noqa: E402
+
+# Paths
+IMAGE_DIRS = [
+    Path("data_repository/validation_test"),
+    Path("data_repository/01_raw_images/second_collection_nov2024"),
+]
+MAX_IMAGES = 10
+REPEATS = 3
+
+
+def normalize_image_reference(image):
+    """Original normalize_image (per-channel percentiles, PIL round-trips, float32)"""
+    img_array = np.array(image, dtype=np.float32)
+
+    for c in range(3):
+        channel = img_array[:, :, c]
+        p95 = np.percentile(channel, 95)
+        if p95 > 0:
+            scale = 240.0 / p95
+            img_array[:, :, c] = np.clip(channel * scale, 0, 255)
+
+    image_wb = Image.fromarray(img_array.astype(np.uint8))
+    image_gray = image_wb.convert('L')
+    equalized_gray = ImageOps.equalize(image_gray)
+
+    orig_lum = np.array(image_gray, dtype=np.float32) + 1
+    eq_lum = np.array(equalized_gray, dtype=np.float32) + 1
+    lum_ratio = eq_lum / orig_lum
+
+    blend = 0.4
+    gentle_ratio = 1.0 + blend * (lum_ratio - 1.0)
+
+    result = np.array(image_wb, dtype=np.float32)
+    for c in range(3):
+        result[:, :, c] = np.clip(result[:, :, c] * gentle_ratio, 0, 255)
+
+    return Image.fromarray(result.astype(np.uint8))
+
+
+def load_test_images():
+    """Real photos if the data repository is present, otherwise synthetic apples"""
+    paths = []
+    for image_dir in IMAGE_DIRS:
+        if image_dir.exists():
+            paths.extend(sorted(p for p in image_dir.rglob("*") if p.suffix.lower() in ('.jpg', '.jpeg', '.png')))
+    if paths:
+        return [(p.name, Image.open(p).convert('RGB')) for p in paths[:MAX_IMAGES]]
+
+    print("⚠️  No photos found - using synthetic 3000x4000 images")
+    rng = np.random.default_rng(42)
+    images = []
+    for i in range(3):
+        h, w = 3000, 4000
+        yy, xx = np.mgrid[0:h, 0:w]
+        arr = np.stack([xx / w * 90 + 90, yy / h * 70 + 110, np.full((h, w), 140.0)], axis=-1)
+        arr[(xx - w / 2) ** 2 + (yy - h / 2) ** 2 < (900 + 100 * i) ** 2] = [210, 170, 70]
+        arr += rng.normal(0, 6, arr.shape)
+        images.append((f"synthetic_{i}", Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))))
+    return images
+
+
+def time_call(fn, image):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn(image)
+    return (time.perf_counter() - start) / REPEATS, result
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("⚡ NORMALIZE_IMAGE BENCHMARK - LUT vs ORIGINAL")
+    print("=" * 70)
+
+    images = load_test_images()
+
+    print(f"\n{'Image':<32s} | {'Size':>11s} | {'Original':>9s} | {'LUT':>8s} | {'Speedup':>7s} | {'Max diff':>8s}")
+    print("-" * 90)
+
+    worst_diff = 0
+    total_ref = total_new = 0.0
+    for name, image in images:
+        ref_time, ref = time_call(normalize_image_reference, image)
+        new_time, new = time_call(normalize_image, image)
+        diff = int(np.abs(np.asarray(ref, dtype=np.int16) - np.asarray(new, dtype=np.int16)).max())
+        worst_diff = max(worst_diff, diff)
+        total_ref += ref_time
+        total_new += new_time
+        size = f"{image.size[0]}x{image.size[1]}"
+        print(f"{name[:32]:<32s} | {size:>11s} | {ref_time * 1000:7.0f}ms | {new_time * 1000:6.0f}ms | "
+              f"{ref_time / new_time:6.1f}x | {diff:>8d}")
+
+    print("-" * 90)
+    print(f"\n📊 Overall speedup: {total_ref / total_new:.1f}x")
+    print(f"   Max pixel difference: {worst_diff} level(s)")
+
+    if worst_diff > 1:
+        print("❌ LUT output drifted more than ±1 level from the original!")
+        sys.exit(1)
+    print("✅ Output compatible with the original implementation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Progressive Resizing Benchmark - time to a target validation MAE
+Trains one variety three ways with the same split, augmentation, early stopping
+and LR schedule as train_regression_model.py:
+    fixed baseline @ full size      (today's training run)
+    fixed gap @ full size
+    progressive gap                 (PROGRESSIVE_SCHEDULE: 112px -> 160px -> full size)
+and reports the wall-clock time and epoch at which each first reaches the target
+validation MAE (default: the best MAE of the fixed baseline run), plus the total
+training time. Validation is always at full resolution. Trained models are not
+saved - the served models are not touched.
+
+Usage:
+    python benchmark_progressive_resizing.py                      # combined
+    python benchmark_progressive_resizing.py gala --epochs 40 --target-mae 1.5
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from tensorflow import keras
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+import apple_api_regression as api  # noqa: E402
+from train_regression_model import (  # noqa: E402
+    IMG_HEIGHT, IMG_WIDTH, MAX_EPOCHS, EARLY_STOPPING_PATIENCE, LR_FACTOR, LR_PATIENCE, MIN_LR,
+    AugmentedDataGenerator, TrainingProgress, collect_training_data, create_regression_model, fit_phases,
+    progressive_schedule
+)
+
+# (label, architecture, progressive)
+RUNS = [
+    ('fixed baseline', 'baseline', False),
+    ('fixed gap', 'gap', False),
+    ('progressive gap', 'gap', True),
+]
+
+
+def train_run(split, architecture, progressive, epochs, patience):
+    """Train one configuration; returns its TrainingProgress and best validation MAE"""
+    X_train, X_val, y_train, y_val = split
+    keras.backend.clear_session()
+
+    size_schedule = progressive_schedule(epochs, (IMG_HEIGHT, IMG_WIDTH)) if progressive else None
+    input_size = (None, None) if progressive else (IMG_HEIGHT, IMG_WIDTH)
+    model = create_regression_model(architecture, input_size)
+
+    train_gen = AugmentedDataGenerator(X_train, y_train, batch_size=8, augment=True)
+    val_gen = AugmentedDataGenerator(X_val, y_val, batch_size=32, augment=False, shuffle=False)
+    early_stopping = keras.callbacks.EarlyStopping(
+        monitor='val_mae', mode='min', patience=patience, restore_best_weights=True,
+        start_from_epoch=size_schedule[-1][0] if size_schedule else 0
+    )
+    progress = TrainingProgress()
+    callbacks = [
+        early_stopping,
+        keras.callbacks.ReduceLROnPlateau(monitor='val_mae', mode='min', factor=LR_FACTOR,
+                                          patience=LR_PATIENCE, min_lr=MIN_LR),
+        progress,
+    ]
+    try:
+        fit_phases(model, train_gen, val_gen, epochs, callbacks, size_schedule, verbose=2)
+    finally:
+        train_gen.close()
+    return progress, min(val_mae for _, _, val_mae in progress.epoch_log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare progressive resizing against fixed-resolution training")
+    parser.add_argument('variety', nargs='?', default='combined', help="Variety to train (default: combined)")
+    parser.add_argument('--epochs', type=int, default=MAX_EPOCHS, help="Maximum training epochs per run")
+    parser.add_argument('--patience', type=int, default=EARLY_STOPPING_PATIENCE, help="Early stopping patience")
+    parser.add_argument('--target-mae', type=float, default=None,
+                        help="Target validation MAE in days (default: best MAE of the fixed baseline run)")
+    args = parser.parse_args()
+
+    if args.variety not in api.MODEL_PATHS:
+        print(f"❌ Unknown variety: {args.variety}")
+        sys.exit(1)
+
+    print("\n" + "=" * 70)
+    print(f"⚡ PROGRESSIVE RESIZING BENCHMARK - TIME TO TARGET MAE ({args.variety})")
+    print("=" * 70)
+    phases = ", ".join(f"{size[0]}px from epoch {first_epoch + 1}"
+                       for first_epoch, size in progressive_schedule(args.epochs))
+    print(f"   Progressive schedule: {phases}")
+
+    images, labels, _ = collect_training_data(None if args.variety == 'combined' else args.variety)
+    if len(images) == 0:
+        print("❌ No training data found")
+        sys.exit(1)
+    split = train_test_split(images, labels, test_size=0.2, random_state=42)
+
+    results = []
+    for label, architecture, progressive in RUNS:
+        print(f"\n🚀 {label}")
+        progress, best_mae = train_run(split, architecture, progressive, args.epochs, args.patience)
+        results.append((label, progress, best_mae))
+
+    target_mae = args.target_mae if args.target_mae is not None else results[0][2]
+    baseline_time = results[0][1].time_to_target(target_mae)
+
+    print(f"\n   Target validation MAE: {target_mae:.3f} days")
+    print(f"\n{'Run':<16s} | {'Best MAE':>8s} | {'Epochs':>6s} | {'Total':>7s} | {'To target':>9s} | "
+          f"{'At epoch':>8s} | {'Speedup':>7s}")
+    print("-" * 80)
+    for label, progress, best_mae in results:
+        total_seconds = progress.epoch_log[-1][1]
+        reached = progress.time_to_target(target_mae)
+        if reached is None:
+            to_target, at_epoch, speedup = "not hit", "-", "-"
+        else:
+            seconds, epoch = reached
+            to_target, at_epoch = f"{seconds / 60:7.1f}m", str(epoch)
+            speedup = f"{baseline_time[0] / seconds:6.1f}x" if baseline_time else "-"
+        print(f"{label:<16s} | {best_mae:8.3f} | {progress.epochs_completed:6d} | {total_seconds / 60:6.1f}m | "
+              f"{to_target:>9s} | {at_epoch:>8s} | {speedup:>7s}")
+
+    print("\n   Train with it: python train_regression_model.py --architecture gap --progressive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Build Fused Model - All variety models in one Keras graph
+Merges the per-variety regression CNNs into a single functional model with a
+shared image input and one output head per variety, so the API can serve
+/analyze_all with one forward pass (USE_FUSED_MODEL=1).
+"""
+
+import sys
+import json
+from pathlib import Path
+import numpy as np
+from tensorflow import keras
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+import apple_api_regression as api  # noqa: E402  (also patches Keras for newer .h5 files)
+
+
+def copy_branch(model, inputs, variety):
+    """
+    Re-create a Sequential model's layers on top of the shared input.
+    Layers get a variety prefix (names must be unique in one graph) and the
+    final Dense layer is named after the variety so it becomes that output.
+    """
+    x = inputs
+    layers = model.layers
+    for i, layer in enumerate(layers):
+        config = layer.get_config()
+        config['name'] = variety if i == len(layers) - 1 else f"{variety}_{layer.name}"
+        new_layer = layer.__class__.from_config(config)
+        x = new_layer(x)
+        new_layer.set_weights(layer.get_weights())
+    return x
+
+
+def build_fused_model(varieties):
+    """
+    Load each variety's .h5 and merge them into one multi-head model.
+    The API preprocesses uploads straight to a model's input size, so every
+    branch must take the same size (raises ValueError otherwise).
+    """
+    models = {variety: keras.models.load_model(api.MODEL_PATHS[variety]) for variety in varieties}
+    sizes = {variety: tuple(model.input_shape[1:3]) for variety, model in models.items()}
+    if len(set(sizes.values())) > 1:
+        raise ValueError(f"Variety models take different input sizes: {sizes}")
+
+    height, width = sizes[varieties[0]]
+    inputs = keras.Input(shape=(height, width, 3), name='image')
+    outputs = []
+    source_models = {}
+
+    for variety, model in models.items():
+        model_path = api.MODEL_PATHS[variety]
+        outputs.append(copy_branch(model, inputs, variety))
+        source_models[variety] = api._file_digest(model_path)
+        print(f"✅ {variety.upper():14} branch added: {model.count_params():,} parameters")
+
+    fused = keras.Model(inputs=inputs, outputs=outputs, name='apple_oxidation_fused')
+    return fused, source_models
+
+
+def check_fused_model(fused, varieties, num_images=4):
+    """Every head must reproduce its source model's predictions"""
+    images = np.random.default_rng(0).random((num_images, *fused.input_shape[1:3], 3)).astype(np.float32)
+    fused_outputs = fused.predict(images, verbose=0)
+    worst = 0.0
+    for variety, head_output in zip(varieties, fused_outputs):
+        source = keras.models.load_model(api.MODEL_PATHS[variety])
+        expected = source.predict(images, verbose=0)
+        worst = max(worst, float(np.abs(head_output - expected).max()))
+    return worst
+
+
+def main():
+    print("\n" + "=" * 70)
+    print("🔗 BUILDING FUSED MULTI-HEAD MODEL")
+    print("=" * 70)
+
+    varieties = [v for v in api.VALID_VARIETIES if api.MODEL_PATHS[v].exists()]
+    missing = [v for v in api.VALID_VARIETIES if v not in varieties]
+    for variety in missing:
+        print(f"⚠️  {variety.upper():14} model not found - skipped")
+
+    if len(varieties) < 2:
+        print("❌ Need at least two variety models to fuse")
+        print("   Train them first: python train_regression_model.py")
+        sys.exit(1)
+
+    try:
+        fused, source_models = build_fused_model(varieties)
+    except ValueError as e:
+        print(f"❌ {e}")
+        print("   Retrain them at one --image-size to fuse them")
+        sys.exit(1)
+    print(f"\n   Fused parameters: {fused.count_params():,}")
+
+    worst = check_fused_model(fused, varieties)
+    print(f"   Max head difference vs source models: {worst:.2e} days")
+    if worst > 1e-3:
+        print("❌ Fused heads do not match the source models - not saving")
+        sys.exit(1)
+
+    fused.save(api.FUSED_MODEL_PATH)
+    print(f"\n💾 Fused model saved to: {api.FUSED_MODEL_PATH}")
+
+    metadata = {
+        'model_type': 'regression_fused',
+        'output_type': 'days_since_cut',
+        'varieties': varieties,
+        'source_models': source_models,
+        'image_size': list(fused.input_shape[1:3]),
+        'parameters': fused.count_params()
+    }
+    with open(api.FUSED_METADATA_PATH, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    print(f"💾 Metadata saved to: {api.FUSED_METADATA_PATH}")
+
+    print("\n✅ Start the API with USE_FUSED_MODEL=1 to serve /analyze_all from it")
+
+
+if __name__ == "__main__":
+    main()
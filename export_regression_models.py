@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Model Export - TFLite and ONNX versions of the regression models
+Converts each backend/apple_oxidation_days_model_*.h5 into a .tflite file (and
+a .onnx file when tf2onnx is installed) for the API's INFERENCE_BACKEND setting.
+Every export is loaded back through the API's own backend class and must match
+the Keras model's predictions within a tolerance before it is kept.
+
+Usage:
+    python export_regression_models.py                  # all varieties, tflite + onnx
+    python export_regression_models.py gala --format tflite
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+import apple_api_regression as api  # noqa: E402  (also patches Keras for newer .h5 files)
+
+# Paths - real photos make the parity check more realistic than random noise
+DATA_DIR = Path("data_repository/01_raw_images/second_collection_nov2024")
+
+# Image settings
+IMG_HEIGHT = 224
+IMG_WIDTH = 224
+
+# Max allowed |exported - keras| prediction difference, in days
+DEFAULT_TOLERANCE = 1e-3
+
+
+def convert_to_tflite(model, optimizations=None, representative_dataset=None, int8_only=False):
+    """Convert a Keras model to a TFLite flatbuffer (float32 unless optimizations given)"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if optimizations:
+        converter.optimizations = optimizations
+    if representative_dataset is not None:
+        converter.representative_dataset = representative_dataset
+    if int8_only:
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+
+def convert_to_onnx(model, output_path):
+    """Convert a Keras model to ONNX via tf2onnx (traced with a dynamic batch size)"""
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None, *model.input_shape[1:3], 3), tf.float32, name='image'),)
+
+    @tf.function(input_signature=spec)
+    def serve(image):
+        return model(image, training=False)
+
+    tf2onnx.convert.from_function(serve, input_signature=spec, opset=13, output_path=str(output_path))
+
+
+def load_sample_images(size=(IMG_HEIGHT, IMG_WIDTH), count=8):
+    """A few training photos preprocessed to a model's (height, width), padded with random images if needed"""
+    images = []
+    if DATA_DIR.exists():
+        for photo_path in sorted(DATA_DIR.rglob("*.JPG"))[:count]:
+            image_array, _, _ = api.preprocess_image(photo_path.read_bytes(), crop=False, normalize=False, size=size)
+            images.append(image_array[0])
+    rng = np.random.default_rng(42)
+    while len(images) < count:
+        images.append(rng.random((*size, 3)))
+    return np.array(images, dtype=np.float32)
+
+
+def check_parity(keras_model, backend, images):
+    """Largest prediction difference between Keras and an export, over single and batched calls"""
+    expected = keras_model.predict(images, verbose=0).ravel()
+    batched = np.asarray(backend.predict(images)).ravel()
+    single = np.array([np.asarray(backend.predict(images[i:i + 1])).ravel()[0] for i in range(len(images))])
+    return float(max(np.abs(batched - expected).max(), np.abs(single - expected).max()))
+
+
+def time_backend(backend, image, repeats=20):
+    """Mean single-image latency in milliseconds"""
+    backend.predict(image)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        backend.predict(image)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def export_variety(variety, formats, tolerance):
+    """Export one variety; returns False if any export failed the parity check"""
+    model_path = api.MODEL_PATHS[variety]
+    keras_backend = api.KerasBackend(model_path)
+    images = load_sample_images(keras_backend.input_size)
+    keras_ms = time_backend(keras_backend, images[:1])
+    print(f"\n🍎 {variety.upper()} (Keras: {keras_ms:.1f} ms/image)")
+
+    ok = True
+    for fmt in formats:
+        backend_cls, suffix = api.INFERENCE_BACKENDS[fmt]
+        output_path = model_path.with_suffix(suffix)
+        staging_path = output_path.with_name(output_path.stem + ".tmp" + suffix)
+
+        try:
+            if fmt == 'tflite':
+                staging_path.write_bytes(convert_to_tflite(keras_backend.model))
+            else:
+                convert_to_onnx(keras_backend.model, staging_path)
+            backend = backend_cls(staging_path)
+        except ImportError as e:
+            print(f"   ⚠️  {fmt}: skipped ({e.name} not installed)")
+            continue
+
+        diff = check_parity(keras_backend.model, backend, images)
+        if diff > tolerance:
+            staging_path.unlink()
+            print(f"   ❌ {fmt}: max difference {diff:.2e} days exceeds {tolerance:.0e} - not saved")
+            ok = False
+            continue
+
+        staging_path.replace(output_path)
+        backend = backend_cls(output_path)
+        export_ms = time_backend(backend, images[:1])
+        print(f"   ✅ {fmt}: {output_path.name} ({output_path.stat().st_size / 1e6:.1f} MB), "
+              f"max diff {diff:.2e} days, {export_ms:.1f} ms/image ({keras_ms / export_ms:.1f}x faster)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export regression models to TFLite / ONNX")
+    parser.add_argument('varieties', nargs='*', default=api.VALID_VARIETIES,
+                        help="Varieties to export (default: all)")
+    parser.add_argument('--format', choices=['tflite', 'onnx', 'all'], default='all')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Max allowed prediction difference vs Keras, in days")
+    args = parser.parse_args()
+
+    formats = ['tflite', 'onnx'] if args.format == 'all' else [args.format]
+
+    print("\n" + "=" * 70)
+    print("📦 EXPORTING REGRESSION MODELS")
+    print("=" * 70)
+
+    all_ok = True
+    exported = 0
+    for variety in args.varieties:
+        if variety not in api.MODEL_PATHS:
+            print(f"❌ Unknown variety: {variety}")
+            sys.exit(1)
+        if not api.MODEL_PATHS[variety].exists():
+            print(f"\n⚠️  {variety.upper()} model not found - skipped")
+            continue
+        all_ok = export_variety(variety, formats, args.tolerance) and all_ok
+        exported += 1
+
+    if exported == 0:
+        print("\n❌ No models found! Train models first: python train_regression_model.py")
+        sys.exit(1)
+    if not all_ok:
+        print("\n❌ Some exports failed the parity check")
+        sys.exit(1)
+
+    print("\n✅ Exports match Keras. Serve them with INFERENCE_BACKEND=tflite (or onnx)")
+
+
+if __name__ == "__main__":
+    main()
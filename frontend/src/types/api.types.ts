@@ -23,5 +23,6 @@ export interface AnalyzeResponse {
 export interface HealthCheckResponse {
   status: string;
   models_loaded: string[];
+  models_available: string[];
   metadata: Record<string, any>;
 }
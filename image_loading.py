@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Training Photo Decoding - PIL and NumPy only
+Target of train_regression_model's decode process pool, so its workers never import TensorFlow
+"""
+
+import sys
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+
+def load_image_uint8(image_path, image_size=(224, 224)):
+    """Load a photo resized to the model input size (height, width), as uint8 (0-255)"""
+    try:
+        img = Image.open(image_path)
+        img = img.convert('RGB')
+        img = img.resize((image_size[1], image_size[0]))
+        return np.array(img, dtype=np.uint8)
+    except Exception as e:
+        print(f"❌ Error loading {image_path}: {e}")
+        return None
+
+
+@contextmanager
+def light_main_module():
+    """
+    Spawned workers re-import the parent's __main__ script (as __mp_main__) before
+    running anything, and the training and benchmark scripts import TensorFlow at the
+    top. Workers started inside this block re-import this module instead.
+    """
+    main_module = sys.modules['__main__']
+    sys.modules['__main__'] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main_module
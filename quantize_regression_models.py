@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Post-Training Quantization - INT8 TFLite models with an accuracy gate
+Builds dynamic-range and full-integer INT8 TFLite variants of each regression
+model, calibrating the integer model on training photos from
+collect_training_data(). Reports size, latency and validation MAE against the
+Keras model, and only publishes a variant whose MAE regression stays under the
+threshold. Serve published variants with INFERENCE_BACKEND=tflite
+TFLITE_VARIANT=dynamic (or int8).
+
+Usage:
+    python quantize_regression_models.py                     # all varieties
+    python quantize_regression_models.py gala --max-mae-increase 0.1
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+import apple_api_regression as api  # noqa: E402
+from train_regression_model import collect_training_data, to_model_input  # noqa: E402
+from export_regression_models import convert_to_tflite, time_backend  # noqa: E402
+
+# Largest validation MAE increase (days) a quantized model may have and still be published
+DEFAULT_MAX_MAE_INCREASE = 0.05
+
+# Training photos used to calibrate full-integer activation ranges
+CALIBRATION_SAMPLES = 100
+
+QUANTIZED_VARIANTS = ['dynamic', 'int8']
+
+
+def quantized_model_path(variety, variant):
+    """Where the API looks for a published variant (see TFLITE_VARIANT)"""
+    model_path = api.MODEL_PATHS[variety]
+    return model_path.with_name(f"{model_path.stem}_{variant}.tflite")
+
+
+def split_like_training(images, labels):
+    """Same 80/20 split train_regression_model.py uses, so validation MAE is comparable"""
+    return train_test_split(images, labels, test_size=0.2, random_state=42)
+
+
+def representative_dataset(images):
+    """Calibration generator for full-integer quantization"""
+    def generator():
+        for image in images[:CALIBRATION_SAMPLES]:
+            yield [to_model_input(image[np.newaxis])]
+    return generator
+
+
+def backend_mae(backend, images, labels, batch_size=32):
+    predictions = []
+    for start in range(0, len(images), batch_size):
+        batch = to_model_input(images[start:start + batch_size])
+        predictions.append(np.asarray(backend.predict(batch)).reshape(-1))
+    return float(np.mean(np.abs(np.concatenate(predictions) - labels)))
+
+
+def quantize_variety(variety, max_mae_increase):
+    """Build, evaluate and (if accurate enough) publish the quantized variants of one model"""
+    print(f"\n{'=' * 70}")
+    print(f"🍎 {variety.upper()}")
+    print(f"{'=' * 70}")
+
+    model_path = api.MODEL_PATHS[variety]
+    keras_backend = api.KerasBackend(model_path)
+
+    # At the model's own input size, so calibration sees what the model was trained on
+    images, labels, _ = collect_training_data(None if variety == 'combined' else variety,
+                                              image_size=keras_backend.input_size)
+    if len(images) == 0:
+        print("❌ No training data found - skipped")
+        return None
+    X_train, X_val, y_train, y_val = split_like_training(images, labels)
+    baseline_mae = backend_mae(keras_backend, X_val, y_val)
+
+    rows = [{
+        'variant': 'keras',
+        'size_mb': model_path.stat().st_size / 1e6,
+        'latency_ms': time_backend(keras_backend, to_model_input(X_val[:1])),
+        'validation_mae': baseline_mae,
+        'mae_delta': 0.0,
+        'published': None
+    }]
+
+    conversions = {
+        'float': dict(),
+        'dynamic': dict(optimizations=[tf.lite.Optimize.DEFAULT]),
+        'int8': dict(optimizations=[tf.lite.Optimize.DEFAULT],
+                     representative_dataset=representative_dataset(X_train),
+                     int8_only=True),
+    }
+
+    for variant, options in conversions.items():
+        staging_path = model_path.with_name(f"{model_path.stem}_{variant}.tmp.tflite")
+        staging_path.write_bytes(convert_to_tflite(keras_backend.model, **options))
+        backend = api.TFLiteBackend(staging_path)
+
+        mae = backend_mae(backend, X_val, y_val)
+        row = {
+            'variant': variant,
+            'size_mb': staging_path.stat().st_size / 1e6,
+            'latency_ms': time_backend(backend, to_model_input(X_val[:1])),
+            'validation_mae': mae,
+            'mae_delta': mae - baseline_mae,
+            'published': None
+        }
+
+        if variant in QUANTIZED_VARIANTS:
+            # Accuracy gate: never publish a model that got meaningfully worse
+            row['published'] = row['mae_delta'] <= max_mae_increase
+            if row['published']:
+                staging_path.replace(quantized_model_path(variety, variant))
+            else:
+                quantized_model_path(variety, variant).unlink(missing_ok=True)
+        if staging_path.exists():
+            staging_path.unlink()
+        rows.append(row)
+
+    print(f"\n{'Variant':<8s} | {'Size':>8s} | {'Latency':>9s} | {'Val MAE':>7s} | {'ΔMAE':>7s} | Published")
+    print("-" * 70)
+    for row in rows:
+        published = {None: "-", True: "✅ yes", False: "❌ MAE gate"}[row['published']]
+        print(f"{row['variant']:<8s} | {row['size_mb']:6.1f}MB | {row['latency_ms']:7.1f}ms | "
+              f"{row['validation_mae']:7.3f} | {row['mae_delta']:+7.3f} | {published}")
+
+    report = {
+        'variety': variety,
+        'validation_samples': len(X_val),
+        'calibration_samples': min(CALIBRATION_SAMPLES, len(X_train)),
+        'max_mae_increase': max_mae_increase,
+        'variants': rows
+    }
+    report_path = model_path.with_name(f"model_metadata_quantization_{variety}.json")
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report saved to: {report_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize regression models to INT8 TFLite")
+    parser.add_argument('varieties', nargs='*', default=api.VALID_VARIETIES,
+                        help="Varieties to quantize (default: all)")
+    parser.add_argument('--max-mae-increase', type=float, default=DEFAULT_MAX_MAE_INCREASE,
+                        help="Largest validation MAE increase (days) allowed for publishing")
+    args = parser.parse_args()
+
+    print("\n🔢 Post-Training Quantization - Regression Models")
+    print(f"   Accuracy gate: ΔMAE <= {args.max_mae_increase:.3f} days")
+
+    for variety in args.varieties:
+        if variety not in api.MODEL_PATHS:
+            print(f"❌ Unknown variety: {variety}")
+            sys.exit(1)
+        if not api.MODEL_PATHS[variety].exists():
+            print(f"\n⚠️  {variety.upper()} model not found - skipped")
+            continue
+        quantize_variety(variety, args.max_mae_increase)
+
+    print("\n🎯 Quantization complete!")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,22 @@ import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import os
 import json
 import io
+import time
+import shutil
+import argparse
+import multiprocessing
+from functools import partial
 from PIL import Image, ImageEnhance, ImageFilter
 import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split
 
+from image_loading import load_image_uint8, light_main_module
+
 # Paths - Second collection November 2024 (3 varieties)
 DATA_DIR = Path("data_repository/01_raw_images/second_collection_nov2024")
 MODEL_DIR = Path("backend")
@@ -34,54 +44,119 @@ METADATA_PATHS = {
     'red_delicious': MODEL_DIR / "model_metadata_regression_red_delicious.json"
 }
 
+# Decoded training photos are cached here (see TrainingImageCache)
+CACHE_DIR = Path("data_repository/02_processed_images/training_cache")
+
+# Processes decoding photos in parallel (1 = decode in this process)
+LOAD_WORKERS = os.cpu_count() or 1
+
 # Image settings
 IMG_HEIGHT = 224
 IMG_WIDTH = 224
 
+# create_regression_model() architectures (see benchmark_architectures.py):
+#   baseline  - 3 conv blocks, Flatten into Dense(128) (~5.6M parameters, almost all in that layer)
+#   gap       - same convs, GlobalAveragePooling2D head (~75x fewer parameters, any input size)
+#   separable - depthwise-separable convs after the first block, GAP head (smallest and fastest)
+ARCHITECTURES = ['baseline', 'gap', 'separable']
+
+# Progressive resizing (--progressive, gap/separable only): early epochs train on
+# downscaled images, which are several times cheaper per step. Each phase is
+# (fraction of max epochs it starts at, square image size - None = full size)
+PROGRESSIVE_SCHEDULE = [(0.0, 112), (0.4, 160), (0.7, None)]
+
+# Seed for augmentation randomness (both training pipelines)
+AUGMENT_SEED = 42
+
+# Training budget: stop once val_mae hasn't improved for EARLY_STOPPING_PATIENCE
+# epochs (keeping the best weights), and halve the learning rate after
+# LR_PATIENCE epochs without improvement
+MAX_EPOCHS = 80
+EARLY_STOPPING_PATIENCE = 15
+LR_PATIENCE = 5
+LR_FACTOR = 0.5
+MIN_LR = 1e-5
+
+# Shared-backbone mode: after the convolutional trunk is trained on every
+# variety, each variety model only fine-tunes the dense head for a short run
+FINETUNE_EPOCHS = 15
+FINETUNE_PATIENCE = 5
+FINETUNE_LEARNING_RATE = 1e-4
+
+# Per-variety checkpoints (every epoch) for --resume, plus the run's progress
+CHECKPOINT_DIR = MODEL_DIR / "checkpoints"
+RUN_STATE_PATH = CHECKPOINT_DIR / "run_state.json"
+
+
+def to_model_input(images):
+    """uint8 images (0-255) -> float32 model input (0-1)"""
+    return images.astype(np.float32) / 255.0
+
+
+def resize_uint8(img_array, image_size):
+    """Resize a uint8 image to (height, width) with the same PIL filter load_image_uint8() uses"""
+    return np.array(Image.fromarray(img_array).resize((image_size[1], image_size[0])), dtype=np.uint8)
+
+
+def progressive_schedule(epochs, image_size=(IMG_HEIGHT, IMG_WIDTH)):
+    """PROGRESSIVE_SCHEDULE for a run of `epochs` as [(first epoch, (height, width)), ...]"""
+    schedule = []
+    for fraction, size in PROGRESSIVE_SCHEDULE:
+        size = tuple(image_size) if size is None else (min(size, image_size[0]), min(size, image_size[1]))
+        schedule.append((int(fraction * epochs), size))
+    return schedule
 
-def phone_augment(img_array):
+
+def phone_augment(img_array, rng=None):
     """
     Apply random augmentations to simulate phone camera conditions.
-    Takes a normalized numpy array (0-1, shape 224x224x3), applies random
-    transformations, returns augmented array in same format.
+    Takes a uint8 numpy array (0-255, shape 224x224x3) - or a normalized
+    0-1 float array - applies random transformations, and returns a float32
+    array normalized to 0-1. Random draws come from rng (a NumPy Generator,
+    fresh OS-seeded one if not given).
     """
-    # Convert back to PIL Image for augmentation (0-255 uint8)
-    img = Image.fromarray((img_array * 255).astype(np.uint8))
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # PIL Image for augmentation (0-255 uint8)
+    if img_array.dtype != np.uint8:
+        img_array = (img_array * 255).astype(np.uint8)
+    img = Image.fromarray(img_array)
 
     # 1. Brightness shift (±30%)
-    factor = np.random.uniform(0.7, 1.3)
+    factor = rng.uniform(0.7, 1.3)
     img = ImageEnhance.Brightness(img).enhance(factor)
 
     # 2. Contrast shift (±30%)
-    factor = np.random.uniform(0.7, 1.3)
+    factor = rng.uniform(0.7, 1.3)
     img = ImageEnhance.Contrast(img).enhance(factor)
 
     # 3. Color temperature - random per-channel scaling to simulate warm/cool lighting
     arr = np.array(img, dtype=np.float32)
-    r_scale = np.random.uniform(0.85, 1.15)
-    g_scale = np.random.uniform(0.90, 1.10)
-    b_scale = np.random.uniform(0.85, 1.15)
+    r_scale = rng.uniform(0.85, 1.15)
+    g_scale = rng.uniform(0.90, 1.10)
+    b_scale = rng.uniform(0.85, 1.15)
     arr[:, :, 0] = np.clip(arr[:, :, 0] * r_scale, 0, 255)
     arr[:, :, 1] = np.clip(arr[:, :, 1] * g_scale, 0, 255)
     arr[:, :, 2] = np.clip(arr[:, :, 2] * b_scale, 0, 255)
     img = Image.fromarray(arr.astype(np.uint8))
 
     # 4. Gaussian blur (0-1.5px radius)
-    radius = np.random.uniform(0, 1.5)
+    radius = rng.uniform(0, 1.5)
     if radius > 0.3:  # skip very small blurs
         img = img.filter(ImageFilter.GaussianBlur(radius=radius))
 
     # 5. Horizontal flip (50% chance)
-    if np.random.random() > 0.5:
+    if rng.random() > 0.5:
         img = img.transpose(Image.FLIP_LEFT_RIGHT)
 
     # 6. Rotation (±15 degrees)
-    angle = np.random.uniform(-15, 15)
+    angle = rng.uniform(-15, 15)
     if abs(angle) > 1:
         img = img.rotate(angle, resample=Image.BILINEAR, fillcolor=(0, 0, 0))
 
     # 7. JPEG compression (quality 50-95%)
-    quality = np.random.randint(50, 96)
+    quality = int(rng.integers(50, 96))
     buffer = io.BytesIO()
     img.save(buffer, format='JPEG', quality=quality)
     buffer.seek(0)
@@ -89,46 +164,242 @@ def phone_augment(img_array):
 
     # 8. Gaussian noise (sigma 0-15)
     arr = np.array(img, dtype=np.float32)
-    sigma = np.random.uniform(0, 15)
-    noise = np.random.normal(0, sigma, arr.shape)
+    sigma = rng.uniform(0, 15)
+    noise = rng.normal(0, sigma, arr.shape)
     arr = np.clip(arr + noise, 0, 255)
 
     # Convert back to normalized array (0-1)
     return arr.astype(np.float32) / 255.0
 
 
+class SharedImageArray:
+    """
+    A NumPy array copied once into multiprocessing shared memory. Pickling
+    only sends the block's name, so process workers attach to the same
+    pages instead of each receiving a copy of the training images.
+    """
+
+    def __init__(self, array):
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.owner = True
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        self.array[...] = array
+
+    def __getstate__(self):
+        return {'name': self.shm.name, 'shape': self.shape, 'dtype': self.dtype.str}
+
+    def __setstate__(self, state):
+        self.shape = state['shape']
+        self.dtype = np.dtype(state['dtype'])
+        self.owner = False
+        self.shm = shared_memory.SharedMemory(name=state['name'])
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def close(self):
+        """Detach (and free the block, in the process that created it)"""
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
 class AugmentedDataGenerator(keras.utils.Sequence):
     """
     Custom data generator that applies phone_augment() on-the-fly.
     Each epoch, every training image gets a fresh random augmentation,
     so the model sees thousands of variations over the full training run.
+    Images are stored as uint8 and only converted to float32 per batch.
+
+    Safe to run with several workers: each batch's shuffle order and
+    augmentations come from a Generator seeded by (seed, epoch, batch), so
+    workers never share RNG state and a run is reproducible whichever worker
+    builds a batch. With use_multiprocessing the images live in shared memory
+    (call close() when training is done).
+
+    image_size (height, width) downscales the batches; progressive resizing
+    changes it between fit() calls. None keeps the images' own size.
+
+    With rows, sample i is images[rows[i]]: training reads its batches straight
+    from the image cache's memory map, so concurrent trainings share its pages
+    instead of each holding a copy.
     """
 
-    def __init__(self, images, labels, batch_size=8, augment=True):
-        self.images = images
+    def __init__(self, images, labels, batch_size=8, augment=True, shuffle=True, seed=AUGMENT_SEED,
+                 workers=1, use_multiprocessing=False, max_queue_size=10, image_size=None, rows=None):
+        super().__init__(workers=workers, use_multiprocessing=use_multiprocessing, max_queue_size=max_queue_size)
+        if rows is not None and use_multiprocessing and workers > 1:
+            # Worker processes attach to one shared-memory copy of just these rows
+            images, rows = np.take(images, rows, axis=0), None
+        self.rows = rows
+        self.shared_images = SharedImageArray(images) if use_multiprocessing and workers > 1 else None
+        self.local_images = None if self.shared_images else images
         self.labels = labels
         self.batch_size = batch_size
         self.augment = augment
-        self.indices = np.arange(len(images))
+        self.shuffle = shuffle
+        self.seed = seed
+        self.image_size = image_size
+        self.epoch = 0
+        self.indices = self._epoch_order()
+
+    @property
+    def images(self):
+        return self.shared_images.array if self.shared_images else self.local_images
+
+    def _epoch_order(self):
+        if not self.shuffle:
+            return np.arange(len(self.labels))
+        return np.random.default_rng([self.seed, self.epoch]).permutation(len(self.labels))
 
     def __len__(self):
-        return int(np.ceil(len(self.images) / self.batch_size))
+        return int(np.ceil(len(self.labels) / self.batch_size))
 
     def __getitem__(self, idx):
         batch_indices = self.indices[idx * self.batch_size:(idx + 1) * self.batch_size]
-        batch_images = []
         batch_labels = self.labels[batch_indices]
+        batch_rows = batch_indices if self.rows is None else self.rows[batch_indices]
+        size = tuple(self.image_size or self.images.shape[1:3])
+        resize = size != tuple(self.images.shape[1:3])
 
-        for i in batch_indices:
-            img = self.images[i]
-            if self.augment:
-                img = phone_augment(img)
-            batch_images.append(img)
+        if not self.augment:
+            images = self.images[batch_rows]
+            if resize:
+                images = np.stack([resize_uint8(img_array, size) for img_array in images])
+            return to_model_input(images), batch_labels
 
-        return np.array(batch_images), batch_labels
+        rng = np.random.default_rng([self.seed, self.epoch, idx])
+        batch_images = np.empty((len(batch_indices), *size, 3), dtype=np.float32)
+        for j, i in enumerate(batch_rows):
+            img_array = resize_uint8(self.images[i], size) if resize else self.images[i]
+            batch_images[j] = phone_augment(img_array, rng)
+
+        return batch_images, batch_labels
 
     def on_epoch_end(self):
-        np.random.shuffle(self.indices)
+        self.epoch += 1
+        self.indices = self._epoch_order()
+
+    def close(self):
+        if self.shared_images:
+            self.shared_images.close()
+
+
+# tf.data pipeline: the same eight phone augmentations as phone_augment(), as
+# TensorFlow ops so they run in parallel across cores. Every image's random
+# parameters come from stateless RNG ops seeded by (seed, element counter),
+# so a run is reproducible regardless of thread scheduling.
+BLUR_TAPS = 9  # Gaussian kernel width (covers ±3 sigma at the 1.5px maximum radius)
+
+
+def _adjust_contrast_tf(img, factor):
+    """PIL ImageEnhance.Contrast: blend with the image's mean grayscale level"""
+    gray = 0.299 * img[..., 0] + 0.587 * img[..., 1] + 0.114 * img[..., 2]
+    mean = tf.floor(tf.reduce_mean(gray) + 0.5)
+    return tf.clip_by_value(mean + factor * (img - mean), 0, 255)
+
+
+def _gaussian_blur_tf(img, radius):
+    """Separable Gaussian blur with standard deviation = radius (PIL GaussianBlur)"""
+    x = tf.range(BLUR_TAPS, dtype=tf.float32) - (BLUR_TAPS - 1) / 2
+    kernel = tf.exp(-x ** 2 / (2 * radius ** 2))
+    kernel = kernel / tf.reduce_sum(kernel)
+    batch = img[tf.newaxis]
+    pad = BLUR_TAPS // 2
+    batch = tf.pad(batch, [[0, 0], [pad, pad], [pad, pad], [0, 0]], mode='SYMMETRIC')
+    horizontal = tf.tile(tf.reshape(kernel, [1, BLUR_TAPS, 1, 1]), [1, 1, 3, 1])
+    vertical = tf.tile(tf.reshape(kernel, [BLUR_TAPS, 1, 1, 1]), [1, 1, 3, 1])
+    batch = tf.nn.depthwise_conv2d(batch, horizontal, [1, 1, 1, 1], 'VALID')
+    batch = tf.nn.depthwise_conv2d(batch, vertical, [1, 1, 1, 1], 'VALID')
+    return batch[0]
+
+
+def _rotate_tf(img, degrees):
+    """Counter-clockwise rotation about the center with black fill (PIL Image.rotate)"""
+    theta = -degrees * np.pi / 180
+    cos, sin = tf.cos(theta), tf.sin(theta)
+    height, width = tf.cast(tf.shape(img)[0], tf.float32), tf.cast(tf.shape(img)[1], tf.float32)
+    cx, cy = (width - 1) / 2, (height - 1) / 2
+    # Maps each output pixel to the input pixel it samples
+    transform = tf.stack([cos, sin, cx - cos * cx - sin * cy,
+                          -sin, cos, cy + sin * cx - cos * cy, 0.0, 0.0])
+    rotated = tf.raw_ops.ImageProjectiveTransformV3(
+        images=img[tf.newaxis], transforms=transform[tf.newaxis], output_shape=tf.shape(img)[:2],
+        fill_value=0.0, interpolation='BILINEAR', fill_mode='CONSTANT'
+    )
+    return rotated[0]
+
+
+def phone_augment_tf(image, seed):
+    """
+    TensorFlow version of phone_augment(): uint8 image (H x W x 3) and a
+    [2] int seed in, float32 0-1 image out
+    """
+    seeds = tf.random.experimental.stateless_split(seed, num=11)
+    uniform = lambda i, low, high: tf.random.stateless_uniform([], seeds[i], low, high)
+    img = tf.cast(image, tf.float32)
+
+    # 1. Brightness shift (±30%)
+    img = tf.clip_by_value(img * uniform(0, 0.7, 1.3), 0, 255)
+
+    # 2. Contrast shift (±30%)
+    img = _adjust_contrast_tf(img, uniform(1, 0.7, 1.3))
+
+    # 3. Color temperature - random per-channel scaling to simulate warm/cool lighting
+    scales = tf.stack([uniform(2, 0.85, 1.15), uniform(3, 0.90, 1.10), uniform(4, 0.85, 1.15)])
+    img = tf.floor(tf.clip_by_value(img * scales, 0, 255))
+
+    # 4. Gaussian blur (0-1.5px radius)
+    radius = uniform(5, 0.0, 1.5)
+    img = tf.cond(radius > 0.3, lambda: _gaussian_blur_tf(img, radius), lambda: img)  # skip very small blurs
+
+    # 5. Horizontal flip (50% chance)
+    img = tf.cond(uniform(6, 0.0, 1.0) > 0.5, lambda: tf.image.flip_left_right(img), lambda: img)
+
+    # 6. Rotation (±15 degrees)
+    angle = uniform(7, -15.0, 15.0)
+    img = tf.cond(tf.abs(angle) > 1, lambda: _rotate_tf(img, angle), lambda: img)
+
+    # 7. JPEG compression (quality 50-95%)
+    img = tf.cast(tf.clip_by_value(tf.round(img), 0, 255), tf.uint8)
+    img = tf.image.stateless_random_jpeg_quality(img, 50, 96, seeds[8])
+    img = tf.cast(img, tf.float32)
+
+    # 8. Gaussian noise (sigma 0-15)
+    sigma = uniform(9, 0.0, 15.0)
+    img = tf.clip_by_value(img + tf.random.stateless_normal(tf.shape(img), seeds[10]) * sigma, 0, 255)
+
+    # Normalized to 0-1 like phone_augment()
+    img = img / 255.0
+    img.set_shape(image.shape)
+    return img
+
+
+def make_tf_dataset(images, labels, batch_size=8, augment=True, seed=AUGMENT_SEED):
+    """
+    tf.data input pipeline over uint8 images.
+    With augment=True the dataset shuffles and augments with phone_augment_tf()
+    and repeats forever (pass steps_per_epoch to fit); every epoch gets new
+    augmentations, seeded deterministically from `seed`. With augment=False it
+    is a single ordered pass converted to float32 0-1 (validation).
+    """
+    dataset = tf.data.Dataset.from_tensor_slices((images, labels.astype(np.float32)))
+
+    if not augment:
+        dataset = dataset.map(lambda image, label: (tf.cast(image, tf.float32) / 255.0, label),
+                              num_parallel_calls=tf.data.AUTOTUNE)
+        return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    dataset = dataset.shuffle(len(images), seed=seed, reshuffle_each_iteration=True).repeat()
+    # The element counter keeps increasing across epochs, so each epoch's seeds differ
+    dataset = tf.data.Dataset.zip((dataset, tf.data.Dataset.counter()))
+    dataset = dataset.map(
+        lambda pair, count: (phone_augment_tf(pair[0], tf.stack([tf.cast(seed, tf.int64), count])), pair[1]),
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=True
+    )
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
 
 
 def parse_photo_metadata(filename):
@@ -156,28 +427,158 @@ def parse_photo_metadata(filename):
     except (IndexError, ValueError):
         return None, None
 
-def load_and_preprocess_image(image_path):
-    """Load and preprocess image for training"""
+def iter_images_parallel(image_paths, workers=LOAD_WORKERS, image_size=(IMG_HEIGHT, IMG_WIDTH)):
+    """
+    Yield load_image_uint8() for every path, decoded by a process pool.
+    Results keep the input order; photos that fail to load yield None.
+    Workers are spawned, not forked: forking after TensorFlow has started its
+    thread pools can deadlock the children. They only import image_loading (PIL
+    and NumPy), and the pool is shut down before training starts.
+    """
+    image_paths = list(image_paths)
+    total = len(image_paths)
+    if total == 0:
+        return
+    workers = max(1, min(workers, total))
+    report_every = max(1, total // 10)
+    start = time.perf_counter()
+
+    load = partial(load_image_uint8, image_size=tuple(image_size))
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
     try:
-        # Load image
-        img = Image.open(image_path)
-        img = img.convert('RGB')
-        img = img.resize((IMG_WIDTH, IMG_HEIGHT))
-        
-        # Convert to array and normalize
-        img_array = np.array(img) / 255.0
-        
-        return img_array
-    except Exception as e:
-        print(f"❌ Error loading {image_path}: {e}")
-        return None
+        if executor:
+            # map() submits every chunk up front, so all workers start inside this block
+            with light_main_module():
+                results = executor.map(load, image_paths, chunksize=max(1, min(16, total // (workers * 4))))
+        else:
+            results = map(load, image_paths)
+        for done, img_array in enumerate(results, start=1):
+            if done % report_every == 0 or done == total:
+                rate = done / (time.perf_counter() - start)
+                print(f"   ⏳ Decoded {done}/{total} photos ({rate:.0f} photos/s, {workers} workers)")
+            yield img_array
+    finally:
+        if executor:
+            executor.shutdown()
+
+def load_images_parallel(image_paths, workers=LOAD_WORKERS, image_size=(IMG_HEIGHT, IMG_WIDTH)):
+    """iter_images_parallel() collected into a list"""
+    return list(iter_images_parallel(image_paths, workers, image_size))
+
+
+class TrainingImageCache:
+    """
+    Decode-once store of resized training photos, shared by every variety.
+    Pixels live in a single uint8 .npy file that is memory-mapped, so a run
+    only reads the rows it uses. index.json maps each photo to its row and
+    records the source file's mtime and size, so only new or changed photos
+    are decoded again. Delete the cache directory to rebuild it from scratch.
+    """
 
-def collect_training_data(variety_filter=None):
+    def __init__(self, cache_dir=CACHE_DIR, image_size=(IMG_HEIGHT, IMG_WIDTH)):
+        self.image_size = tuple(image_size)
+        self.dir = Path(cache_dir) / f"{self.image_size[0]}x{self.image_size[1]}"
+        self.images_path = self.dir / "images.npy"
+        self.index_path = self.dir / "index.json"
+        self.index = {'rows': 0, 'files': {}}
+        self.images = None
+
+        if self.images_path.exists() and self.index_path.exists():
+            with open(self.index_path, 'r') as f:
+                self.index = json.load(f)
+            self.images = np.load(self.images_path, mmap_mode='r+')
+
+    @staticmethod
+    def _key(photo_path):
+        return Path(photo_path).relative_to(DATA_DIR).as_posix()
+
+    def _reserve(self, rows):
+        """Grow the pixel file to hold at least this many rows"""
+        capacity = 0 if self.images is None else len(self.images)
+        if rows <= capacity:
+            return
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        staging_path = self.images_path.with_name("images.tmp.npy")
+        grown = np.lib.format.open_memmap(
+            staging_path, mode='w+', dtype=np.uint8, shape=(rows, *self.image_size, 3)
+        )
+        if capacity:
+            grown[:capacity] = self.images
+        grown.flush()
+        del grown
+        self.images = None
+        staging_path.replace(self.images_path)
+        self.images = np.load(self.images_path, mmap_mode='r+')
+
+    def _save_index(self):
+        staging_path = self.index_path.with_name("index.tmp.json")
+        with open(staging_path, 'w') as f:
+            json.dump(self.index, f)
+        staging_path.replace(self.index_path)
+
+    def rows_for(self, photo_paths, workers=LOAD_WORKERS):
+        """
+        Cache row of each photo (None if it can't be decoded), decoding
+        only photos that are new or changed since they were cached
+        """
+        files = self.index['files']
+        rows = []
+        stale = []
+        for i, photo_path in enumerate(photo_paths):
+            stat = Path(photo_path).stat()
+            entry = files.get(self._key(photo_path))
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                rows.append(entry['row'])
+            else:
+                rows.append(None)
+                stale.append((i, photo_path, stat))
+
+        print(f"   💾 Image cache: {len(rows) - len(stale)} cached, {len(stale)} to decode")
+        if not stale:
+            return rows
+
+        img_arrays = load_images_parallel([photo_path for _, photo_path, _ in stale], workers, self.image_size)
+        decoded = [(i, photo_path, stat, img_array) for (i, photo_path, stat), img_array in zip(stale, img_arrays)]
+        if all(img_array is None for *_, img_array in decoded):
+            # Only unreadable photos - leave the files alone (they may be shared with other trainings)
+            return rows
+
+        # Changed photos overwrite their old row, new photos are appended
+        next_row = self.index['rows']
+        for i, photo_path, stat, img_array in decoded:
+            if img_array is None:
+                continue
+            entry = files.get(self._key(photo_path))
+            if entry is None:
+                entry = {'row': next_row}
+                next_row += 1
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            files[self._key(photo_path)] = entry
+            rows[i] = entry['row']
+
+        self._reserve(next_row)
+        for i, _, _, img_array in decoded:
+            if img_array is not None:
+                self.images[rows[i]] = img_array
+        self.images.flush()
+
+        # Index last: if interrupted, the photos are simply decoded again next run
+        self.index['rows'] = next_row
+        self._save_index()
+        return rows
+
+def find_training_photos(variety_filter=None):
     """
-    Collect all photos with their days labels
+    Every labelled photo for a variety
 
     Args:
         variety_filter: 'gala', 'smith', 'red_delicious', or None for all
+
+    Returns:
+        photo paths, labels in days, and filenames
     """
 
     print(f"\n📸 Collecting training data from photos...")
@@ -186,7 +587,7 @@ def collect_training_data(variety_filter=None):
     else:
         print(f"   Using ALL varieties (combined model)")
 
-    images = []
+    photo_paths = []
     labels = []  # Days since cut (continuous)
     filenames = []
 
@@ -212,49 +613,136 @@ def collect_training_data(variety_filter=None):
             print(f"   ⚠️  Directory not found: {apple_dir}")
             continue
 
-        for photo_path in apple_dir.rglob("*.JPG"):
+        # Sorted so the train/validation split is the same on every machine
+        variety_count = 0
+        for photo_path in sorted(apple_dir.rglob("*.JPG")):
             days, apple = parse_photo_metadata(photo_path.name)
 
             if days is None:
                 continue
 
-            # Load and preprocess image
-            img_array = load_and_preprocess_image(photo_path)
-
-            if img_array is not None:
-                images.append(img_array)
-                labels.append(days)
-                filenames.append(photo_path.name)
+            photo_paths.append(photo_path)
+            labels.append(days)
+            filenames.append(photo_path.name)
+            variety_count += 1
 
         # Show count per variety
-        variety_count = sum(1 for f in filenames if f.startswith(apple_type.replace('_', ' ').split()[0]))
-        print(f"   📁 {apple_type}: loaded images from {apple_dir}")
+        print(f"   📁 {apple_type}: {variety_count} photos in {apple_dir}")
 
-    print(f"✅ Loaded {len(images)} images total")
+    return photo_paths, labels, filenames
+
+def print_loaded(labels):
+    """Summary line after collecting photos"""
+    print(f"✅ Loaded {len(labels)} images total")
     if len(labels) > 0:
         print(f"   Days range: {min(labels):.2f} - {max(labels):.2f}")
 
-    return np.array(images), np.array(labels), filenames
+def collect_training_rows(variety_filter=None, workers=LOAD_WORKERS, image_size=(IMG_HEIGHT, IMG_WIDTH)):
+    """
+    Photos as rows of the TrainingImageCache memory map, without copying any pixels
+
+    Returns:
+        the cache's uint8 image memmap (None if there are no photos), each photo's
+        row in it (photos that fail to decode are skipped), labels in days, and filenames
+    """
+    photo_paths, labels, filenames = find_training_photos(variety_filter)
+    cache = TrainingImageCache(image_size=image_size)
+    rows = cache.rows_for(photo_paths, workers)
+    keep = [i for i, row in enumerate(rows) if row is not None]
+    rows = np.array([rows[i] for i in keep], dtype=np.int64)
+    labels = [labels[i] for i in keep]
+    filenames = [filenames[i] for i in keep]
+    print_loaded(labels)
+
+    return cache.images, rows, np.array(labels), filenames
+
+def collect_training_data(variety_filter=None, use_cache=True, workers=LOAD_WORKERS, image_size=(IMG_HEIGHT, IMG_WIDTH)):
+    """
+    Collect all photos with their days labels, as an array of their own
+    (training itself reads collect_training_rows() instead)
+
+    Args:
+        variety_filter: 'gala', 'smith', 'red_delicious', or None for all
+        use_cache: read decoded images from TrainingImageCache (decoding only new/changed photos)
+        workers: processes used to decode photos
+        image_size: (height, width) the photos are resized to
+
+    Returns:
+        images as one uint8 array (N x height x width x 3, 0-255 - see to_model_input),
+        labels in days, and filenames
+    """
+    if use_cache:
+        cached, rows, labels, filenames = collect_training_rows(variety_filter, workers, image_size)
+        images = np.empty((len(rows), *image_size, 3), dtype=np.uint8)
+        if len(rows):
+            np.take(cached, rows, axis=0, out=images)
+        return images, labels, filenames
+
+    photo_paths, labels, filenames = find_training_photos(variety_filter)
+
+    # Load and preprocess images (skipping any that fail to decode)
+    # Images go straight into one preallocated uint8 array (8x smaller than float64)
+    images = np.empty((len(photo_paths), *image_size, 3), dtype=np.uint8)
+    keep = []
+    for i, img_array in enumerate(iter_images_parallel(photo_paths, workers, image_size)):
+        if img_array is not None:
+            images[len(keep)] = img_array
+            keep.append(i)
+    images = images[:len(keep)]
+    labels = [labels[i] for i in keep]
+    filenames = [filenames[i] for i in keep]
+    print_loaded(labels)
+
+    return images, np.array(labels), filenames
+
+def create_regression_model(architecture='baseline', image_size=(IMG_HEIGHT, IMG_WIDTH)):
+    """
+    Create CNN model for days prediction (regression)
+
+    Args:
+        architecture: one of ARCHITECTURES ('baseline', 'gap', 'separable')
+        image_size: (height, width) of the input images
+    """
+    if architecture not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture '{architecture}'. Use one of {ARCHITECTURES}")
+
+    if architecture == 'separable':
+        # Depthwise-separable convolutions: ~8x fewer multiply-adds per block
+        conv_layers = [
+            keras.layers.Conv2D(32, (3, 3), activation='relu'),
+            keras.layers.MaxPooling2D((2, 2)),
+
+            keras.layers.SeparableConv2D(64, (3, 3), activation='relu'),
+            keras.layers.MaxPooling2D((2, 2)),
+
+            keras.layers.SeparableConv2D(64, (3, 3), activation='relu'),
+            keras.layers.MaxPooling2D((2, 2)),
+        ]
+    else:
+        conv_layers = [
+            keras.layers.Conv2D(32, (3, 3), activation='relu'),
+            keras.layers.MaxPooling2D((2, 2)),
+
+            keras.layers.Conv2D(64, (3, 3), activation='relu'),
+            keras.layers.MaxPooling2D((2, 2)),
+
+            keras.layers.Conv2D(64, (3, 3), activation='relu'),
+            keras.layers.MaxPooling2D((2, 2)),
+        ]
+
+    # Flatten feeds the whole 26x26x64 feature map into Dense(128); global average
+    # pooling feeds one value per channel, so the head no longer depends on input size
+    pooling = keras.layers.Flatten() if architecture == 'baseline' else keras.layers.GlobalAveragePooling2D()
 
-def create_regression_model():
-    """Create CNN model for days prediction (regression)"""
-    
     model = keras.Sequential([
         # Input layer
-        keras.layers.Input(shape=(IMG_HEIGHT, IMG_WIDTH, 3)),
+        keras.layers.Input(shape=(*image_size, 3)),
         
         # Convolutional layers
-        keras.layers.Conv2D(32, (3, 3), activation='relu'),
-        keras.layers.MaxPooling2D((2, 2)),
-        
-        keras.layers.Conv2D(64, (3, 3), activation='relu'),
-        keras.layers.MaxPooling2D((2, 2)),
-        
-        keras.layers.Conv2D(64, (3, 3), activation='relu'),
-        keras.layers.MaxPooling2D((2, 2)),
+        *conv_layers,
         
         # Dense layers
-        keras.layers.Flatten(),
+        pooling,
         keras.layers.Dense(128, activation='relu'),
         keras.layers.Dropout(0.5),
         keras.layers.Dense(64, activation='relu'),
@@ -272,13 +760,123 @@ def create_regression_model():
     
     return model
 
-def train_model(variety='combined'):
+class TrainingProgress(keras.callbacks.Callback):
+    """
+    Records the first and last epoch of a fit() call (absolute numbers, also
+    when resumed), and each epoch's val_mae with the seconds since fit() started
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.first_epoch = None
+        self.epochs_completed = 0
+        self.epoch_log = []  # (epoch, seconds, val_mae)
+        self.start_time = None
+
+    def on_train_begin(self, logs=None):
+        if self.start_time is None:  # the first of possibly several fit() calls
+            self.start_time = time.perf_counter()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        if self.first_epoch is None:
+            self.first_epoch = epoch
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epochs_completed = epoch + 1
+        self.epoch_log.append((epoch + 1, time.perf_counter() - self.start_time, (logs or {}).get('val_mae')))
+
+    def time_to_target(self, target_mae):
+        """(seconds, epoch) when val_mae first reached target_mae, or None if it never did"""
+        for epoch, seconds, val_mae in self.epoch_log:
+            if val_mae is not None and val_mae <= target_mae:
+                return seconds, epoch
+        return None
+
+
+def training_callbacks(variety, patience=EARLY_STOPPING_PATIENCE, resume=False, start_from_epoch=0):
+    """
+    Early stopping, LR schedule and per-epoch checkpoints for one variety run
+    (early stopping only counts epochs from start_from_epoch on). The checkpoint
+    is kept until training is over - remove it with shutil.rmtree(CHECKPOINT_DIR / variety).
+    """
+    backup_dir = CHECKPOINT_DIR / variety
+    if not resume and backup_dir.exists():
+        # A fresh run must not pick up an old interrupted run's checkpoint
+        shutil.rmtree(backup_dir)
+
+    early_stopping = keras.callbacks.EarlyStopping(
+        monitor='val_mae', mode='min', patience=patience, restore_best_weights=True, verbose=1,
+        start_from_epoch=start_from_epoch
+    )
+    return [
+        early_stopping,
+        keras.callbacks.ReduceLROnPlateau(
+            monitor='val_mae', mode='min', factor=LR_FACTOR, patience=LR_PATIENCE, min_lr=MIN_LR, verbose=1
+        ),
+        # Saves weights, optimizer state and epoch after every epoch. Kept between fit() calls,
+        # so each progressive resizing phase picks up at the epoch the previous one reached
+        keras.callbacks.BackupAndRestore(backup_dir=str(backup_dir), save_freq='epoch', delete_checkpoint=False),
+    ], early_stopping
+
+def fit_phases(model, train_gen, val_gen, epochs, callbacks, size_schedule=None, steps_per_epoch=None, verbose=1):
+    """
+    model.fit() for `epochs` epochs. With a size_schedule (progressive_schedule)
+    there is one fit() per resolution phase - Keras fixes the batch shape for a
+    whole fit() call - with train_gen.image_size set for each. Returns one
+    History covering all phases.
+    """
+    phases = size_schedule or [(0, None)]
+    histories = []
+    for i, (first_epoch, size) in enumerate(phases):
+        last_epoch = phases[i + 1][0] if i + 1 < len(phases) else epochs
+        if last_epoch <= first_epoch:
+            continue
+        if size_schedule:
+            train_gen.image_size = size
+            print(f"\n📐 Epochs {first_epoch + 1}-{last_epoch}: {size[0]}x{size[1]} images")
+        histories.append(model.fit(
+            train_gen,
+            validation_data=val_gen,
+            initial_epoch=first_epoch,
+            epochs=last_epoch,
+            steps_per_epoch=steps_per_epoch,
+            callbacks=callbacks,
+            verbose=verbose
+        ))
+        if model.stop_training:
+            break
+
+    merged = {}
+    for phase_history in histories:
+        for key, values in phase_history.history.items():
+            merged.setdefault(key, []).extend(values)
+    history = histories[-1]
+    history.history = merged
+    return history
+
+def train_model(variety='combined', pipeline='generator', workers=1, use_multiprocessing=False, max_queue_size=10,
+                epochs=MAX_EPOCHS, patience=EARLY_STOPPING_PATIENCE, resume=False, verbose=1,
+                architecture='baseline', image_size=(IMG_HEIGHT, IMG_WIDTH), progressive=False):
     """
     Train the regression model for a specific variety
 
     Args:
         variety: 'combined', 'gala', 'smith', or 'red_delicious'
+        pipeline: 'generator' (AugmentedDataGenerator + phone_augment) or
+                  'tfdata' (make_tf_dataset + phone_augment_tf, multi-core)
+        workers, use_multiprocessing, max_queue_size: parallel batch loading
+                  for the generator pipeline (threads, or processes sharing
+                  the images through shared memory)
+        epochs: maximum epochs (early stopping usually ends sooner)
+        patience: epochs without val_mae improvement before stopping
+        resume: continue from this variety's last checkpoint if one exists
+        verbose: Keras fit() verbosity (2 = one line per epoch)
+        architecture, image_size: model variant (see create_regression_model)
+        progressive: train the early epochs at lower resolution (PROGRESSIVE_SCHEDULE);
+                  needs a 'gap' or 'separable' architecture and the generator pipeline
     """
+    if progressive and architecture == 'baseline':
+        raise ValueError("Progressive resizing needs an input-size independent architecture ('gap' or 'separable')")
 
     variety_names = {
         'combined': 'All Varieties (Gala, Granny Smith, Red Delicious)',
@@ -294,47 +892,112 @@ def train_model(variety='combined'):
     
     # Collect data with variety filter
     variety_filter = None if variety == 'combined' else variety
-    images, labels, filenames = collect_training_data(variety_filter)
+    images, rows, labels, filenames = collect_training_rows(variety_filter, image_size=image_size)
     
-    if len(images) == 0:
+    if len(rows) == 0:
         print("❌ No training data found!")
         return None, None
     
-    # Split into train/validation sets (80/20)
+    # Split into train/validation sets (80/20) of image cache rows - the pixels
+    # stay in the memory-mapped cache, shared with any concurrent training
     X_train, X_val, y_train, y_val = train_test_split(
-        images, labels, test_size=0.2, random_state=42
+        rows, labels, test_size=0.2, random_state=42
     )
     
     print(f"\n📊 Dataset split:")
     print(f"   Training: {len(X_train)} images")
     print(f"   Validation: {len(X_val)} images")
 
+    # Create model
+    print(f"\n🏗️  Building regression model ({architecture}, {image_size[0]}x{image_size[1]} input)...")
+    model = create_regression_model(architecture, image_size)
+
+    print(f"   Total parameters: {model.count_params():,}")
+
+    extra_metadata = {'architecture': architecture}
+    size_schedule = None
+    serving_model = None
+    if progressive:
+        # Trained with a variable input size, saved with the fixed one the API expects
+        size_schedule = progressive_schedule(epochs, image_size)
+        serving_model = model
+        model = create_regression_model(architecture, (None, None))
+        extra_metadata['resolution_schedule'] = [[first_epoch + 1, *size] for first_epoch, size in size_schedule]
+        phases = ", ".join(f"{size[0]}px from epoch {first_epoch + 1}" for first_epoch, size in size_schedule)
+        print(f"   Progressive resizing: {phases}")
+
+    return fit_and_save_model(model, variety, images, (X_train, X_val, y_train, y_val), pipeline, workers,
+                              use_multiprocessing, max_queue_size, epochs, patience, resume, verbose,
+                              extra_metadata=extra_metadata, size_schedule=size_schedule,
+                              serving_model=serving_model)
+
+def fit_and_save_model(model, variety, images, split, pipeline='generator', workers=1, use_multiprocessing=False,
+                       max_queue_size=10, epochs=MAX_EPOCHS, patience=EARLY_STOPPING_PATIENCE, resume=False,
+                       verbose=1, extra_metadata=None, size_schedule=None, serving_model=None):
+    """
+    Train a compiled model on a (X_train, X_val, y_train, y_val) split, where X_train
+    and X_val are rows of images (the image cache memmap from collect_training_rows),
+    then save it (with metadata and training plot) as the variety's model. See train_model() for
+    the training options; extra_metadata is merged into the saved metadata.
+    size_schedule downscales early training epochs (progressive resizing); its
+    weights are then copied into serving_model, which is what gets saved.
+    """
+    X_train, X_val, y_train, y_val = split
+    labels = np.concatenate([y_train, y_val])
+
     # Create augmented data generator for training
     # Validation data is NOT augmented - we want to measure real accuracy
-    train_gen = AugmentedDataGenerator(X_train, y_train, batch_size=8, augment=True)
-    print(f"   Augmentation: ENABLED (phone simulation)")
+    if pipeline == 'tfdata' and size_schedule:
+        raise ValueError("Progressive resizing is only supported by the 'generator' pipeline")
+    if pipeline == 'tfdata':
+        # tf.data keeps its own copy of the tensors it is built from
+        train_gen = make_tf_dataset(np.take(images, X_train, axis=0), y_train, batch_size=8, augment=True)
+        val_gen = make_tf_dataset(np.take(images, X_val, axis=0), y_val, batch_size=32, augment=False)
+        steps_per_epoch = int(np.ceil(len(X_train) / 8))  # the augmented dataset repeats forever
+    elif pipeline == 'generator':
+        train_gen = AugmentedDataGenerator(images, y_train, batch_size=8, augment=True, workers=workers,
+                                           use_multiprocessing=use_multiprocessing, max_queue_size=max_queue_size,
+                                           rows=X_train)
+        val_gen = AugmentedDataGenerator(images, y_val, batch_size=32, augment=False, shuffle=False, rows=X_val)
+        steps_per_epoch = None
+        if workers > 1:
+            print(f"   Loading batches with {workers} {'processes' if use_multiprocessing else 'threads'}")
+    else:
+        raise ValueError(f"Unknown pipeline '{pipeline}'. Use 'generator' or 'tfdata'")
+    print(f"   Augmentation: ENABLED (phone simulation, {pipeline} pipeline)")
     print(f"   Each image gets random brightness, contrast, color temp, blur,")
     print(f"   noise, JPEG compression, rotation, and flip per epoch")
 
-    # Create model
-    print("\n🏗️  Building regression model...")
-    model = create_regression_model()
+    # Train model - up to `epochs`, stopping early once val_mae stops improving
+    print(f"\n🚀 Training model with augmentation (max {epochs} epochs, early stopping patience {patience})...")
 
-    print(f"   Total parameters: {model.count_params():,}")
+    # With progressive resizing, don't stop early before the full-resolution phase
+    start_from_epoch = size_schedule[-1][0] if size_schedule else 0
+    callbacks, early_stopping = training_callbacks(variety, patience, resume, start_from_epoch)
+    progress = TrainingProgress()
+    start_time = time.perf_counter()
+    try:
+        history = fit_phases(model, train_gen, val_gen, epochs, callbacks + [progress], size_schedule,
+                             steps_per_epoch, verbose)
+    finally:
+        if isinstance(train_gen, AugmentedDataGenerator):
+            train_gen.close()
+    training_seconds = time.perf_counter() - start_time
+    shutil.rmtree(CHECKPOINT_DIR / variety, ignore_errors=True)
 
-    # Train model - more epochs since augmentation makes learning harder
-    print("\n🚀 Training model with augmentation...")
+    if progress.first_epoch:
+        print(f"   ↪️  Resumed from checkpoint at epoch {progress.first_epoch + 1}")
+    best_epoch = early_stopping.best_epoch + 1 if early_stopping.best is not None else progress.epochs_completed
+    print(f"   Epochs run: {progress.epochs_completed}/{epochs} (best val_mae at epoch {best_epoch}), "
+          f"{training_seconds / 60:.1f} min")
 
-    history = model.fit(
-        train_gen,
-        validation_data=(X_val, y_val),
-        epochs=80,
-        verbose=1
-    )
+    if serving_model is not None:
+        serving_model.set_weights(model.get_weights())
+        model = serving_model
     
     # Evaluate
     print("\n📊 Evaluation Results:")
-    val_loss, val_mae = model.evaluate(X_val, y_val, verbose=0)
+    val_loss, val_mae = model.evaluate(val_gen, verbose=0)
     print(f"   Validation MAE: {val_mae:.3f} days")
     print(f"   Validation MSE: {val_loss:.3f}")
     
@@ -357,15 +1020,24 @@ def train_model(variety='combined'):
             'min': float(labels.min()),
             'max': float(labels.max())
         },
-        'image_size': [IMG_HEIGHT, IMG_WIDTH],
+        'image_size': list(model.input_shape[1:3]),
         'parameters': model.count_params(),
+        'architecture': 'baseline',
+        'training_mode': 'from_scratch',
+        'epochs_trained': progress.epochs_completed,
+        'max_epochs': epochs,
+        'best_epoch': best_epoch,
+        'resumed_from_epoch': progress.first_epoch + 1 if progress.first_epoch else None,
+        'training_seconds': round(training_seconds, 1),
         'augmentation': 'phone_simulation',
+        'augmentation_pipeline': pipeline,
         'augmentation_types': [
             'brightness', 'contrast', 'color_temperature',
             'gaussian_blur', 'horizontal_flip', 'rotation',
             'jpeg_compression', 'gaussian_noise'
         ]
     }
+    metadata.update(extra_metadata or {})
     
     metadata_path = METADATA_PATHS[variety]
     with open(metadata_path, 'w') as f:
@@ -383,7 +1055,7 @@ def train_model(variety='combined'):
     print("-" * 70)
     
     # Show first 10 validation predictions
-    predictions = model.predict(X_val[:10], verbose=0)
+    predictions = model.predict(to_model_input(images[X_val[:10]]), verbose=0)
     for i in range(min(10, len(y_val))):
         actual = y_val[i]
         predicted = predictions[i][0]
@@ -394,6 +1066,106 @@ def train_model(variety='combined'):
     
     return model, history
 
+def variety_splits(varieties, image_size=(IMG_HEIGHT, IMG_WIDTH)):
+    """
+    The image cache memmap, and the train/validation split of its rows each
+    variety's own train_model() run would use
+    """
+    images = None
+    splits = {}
+    for variety in varieties:
+        # The last memmap opened covers every row (the cache only grows)
+        images, rows, labels, _ = collect_training_rows(variety, image_size=image_size)
+        if len(rows) == 0:
+            print(f"   ⚠️  No photos for {variety} - skipped")
+            continue
+        splits[variety] = train_test_split(rows, labels, test_size=0.2, random_state=42)
+    return images, splits
+
+def freeze_backbone(model):
+    """Freeze the convolutional trunk (everything up to and including the pooling), leaving the dense head trainable"""
+    head_types = (keras.layers.Flatten, keras.layers.GlobalAveragePooling2D)
+    pooling_index = next(i for i, layer in enumerate(model.layers) if isinstance(layer, head_types))
+    for layer in model.layers[:pooling_index + 1]:
+        layer.trainable = False
+
+def train_shared_backbone(varieties, pipeline='generator', epochs=MAX_EPOCHS, patience=EARLY_STOPPING_PATIENCE,
+                          finetune_epochs=FINETUNE_EPOCHS, resume=False, completed=(), on_complete=None,
+                          architecture='baseline', image_size=(IMG_HEIGHT, IMG_WIDTH)):
+    """
+    Train the combined model once, then fine-tune only its dense head per variety
+
+    The combined model (the shared backbone) trains on the union of the
+    per-variety training splits, so no variety's validation photos are seen by
+    its trunk. Each variety model starts from the combined weights, with the
+    convolutional layers frozen, and is saved to MODEL_PATHS like a normal run.
+    The combined model is only (re)trained when 'combined' is in `varieties`;
+    otherwise the existing one is loaded as the backbone (with its own
+    architecture and input size). `completed` varieties are not retrained.
+    """
+    print("\n🍎 Shared-Backbone Training")
+    print("=" * 70)
+    backbone = None
+    if 'combined' not in varieties and MODEL_PATHS['combined'].exists():
+        backbone = keras.models.load_model(MODEL_PATHS['combined'])
+        image_size = tuple(backbone.input_shape[1:3])
+        backbone_metadata = {}
+        if METADATA_PATHS['combined'].exists():
+            with open(METADATA_PATHS['combined'], 'r') as f:
+                backbone_metadata = json.load(f)
+        architecture = backbone_metadata.get('architecture', 'baseline')
+        print(f"\n↪️  Using the existing combined model as the backbone ({architecture}, "
+              f"{image_size[0]}x{image_size[1]}): {MODEL_PATHS['combined']}")
+        print("   Name 'combined' to retrain it")
+        if backbone_metadata.get('training_mode') != 'shared_backbone':
+            print("   ⚠️  It was not trained on the union of variety splits, so it has seen their "
+                  "validation photos - fine-tuned MAE will be optimistic")
+
+    images, splits = variety_splits([variety for variety in MODEL_PATHS if variety != 'combined'], image_size)
+    if not splits:
+        print("❌ No training data found!")
+        return
+
+    if backbone is None:
+        print("\n🏗️  Training the shared backbone on all varieties...")
+        union = [np.concatenate([split[i] for split in splits.values()]) for i in range(4)]
+        backbone = create_regression_model(architecture, image_size)
+        backbone, _ = fit_and_save_model(
+            backbone, 'combined', images, union, pipeline, epochs=epochs, patience=patience, resume=resume,
+            extra_metadata={'architecture': architecture, 'training_mode': 'shared_backbone',
+                            'split': 'union_of_variety_splits'}
+        )
+        if on_complete:
+            on_complete('combined')
+
+    for variety in varieties:
+        if variety == 'combined' or variety in completed or variety not in splits:
+            continue
+        print(f"\n\n{'='*70}")
+        print(f"FINE-TUNING: {variety.upper()} HEAD")
+        print(f"{'='*70}\n")
+
+        model = keras.models.clone_model(backbone)
+        model.set_weights(backbone.get_weights())
+        freeze_backbone(model)
+        model.compile(
+            optimizer=keras.optimizers.Adam(FINETUNE_LEARNING_RATE),
+            loss='mean_squared_error',
+            metrics=['mae']
+        )
+        trainable = sum(int(np.prod(w.shape)) for w in model.trainable_weights)
+        print(f"   Trainable parameters: {trainable:,} of {model.count_params():,}")
+
+        fit_and_save_model(
+            model, variety, images, splits[variety], pipeline, epochs=finetune_epochs,
+            patience=min(patience, FINETUNE_PATIENCE), resume=resume,
+            extra_metadata={'architecture': architecture, 'training_mode': 'fine_tuned',
+                            'backbone': str(MODEL_PATHS['combined']),
+                            'finetune_learning_rate': FINETUNE_LEARNING_RATE}
+        )
+        if on_complete:
+            on_complete(variety)
+
 def plot_training_history(history, variety='combined'):
     """Plot training history"""
     
@@ -428,42 +1200,188 @@ def plot_training_history(history, variety='combined'):
     
     plt.close()
 
+def load_run_state(resume):
+    """Varieties already finished by the interrupted run (--resume), else start a new run"""
+    if resume and RUN_STATE_PATH.exists():
+        with open(RUN_STATE_PATH) as f:
+            return json.load(f)
+    return {'completed': []}
+
+
+def save_run_state(state):
+    RUN_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(RUN_STATE_PATH, 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def train_in_subprocess(variety, threads, train_options):
+    """
+    Worker for --parallel: train one variety (train_model keyword arguments in
+    train_options) with TensorFlow limited to `threads` CPU threads, returning
+    its saved metadata (or None if there was no data)
+    """
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(max(1, threads // 2))
+    for gpu in tf.config.list_physical_devices('GPU'):
+        # Share GPUs between the concurrent trainings instead of the first one taking all memory
+        tf.config.experimental.set_memory_growth(gpu, True)
+
+    model, _ = train_model(variety, verbose=2, **train_options)
+    if model is None:
+        return None
+    with open(METADATA_PATHS[variety], 'r') as f:
+        return json.load(f)
+
+
+def train_parallel(varieties, train_options, on_complete=None):
+    """
+    Train several varieties at once, one process each, splitting the CPU cores between them.
+    train_options are passed to train_model(). Returns {variety: metadata, or the exception
+    if its training failed}.
+    """
+    # Decode every photo into the shared image cache first, so the trainings only read
+    # (memory-map) it instead of decoding or writing the same photos concurrently.
+    # They train straight from its pages, so the dataset is in memory once.
+    print("\n💾 Preparing the shared image cache...")
+    collect_training_rows(image_size=train_options.get('image_size', (IMG_HEIGHT, IMG_WIDTH)))
+
+    cores = os.cpu_count() or 1
+    threads = max(1, cores // len(varieties))
+    print(f"\n🚀 Training {len(varieties)} models in parallel ({threads} TensorFlow threads each, {cores} cores)")
+
+    results = {}
+    # spawn, not fork: TensorFlow's runtime isn't fork-safe
+    with ProcessPoolExecutor(max_workers=len(varieties), mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {
+            executor.submit(train_in_subprocess, variety, threads, train_options): variety
+            for variety in varieties
+        }
+        for future in as_completed(futures):
+            variety = futures[future]
+            try:
+                results[variety] = future.result()
+            except Exception as e:
+                results[variety] = e
+                print(f"\n❌ {variety.upper()} training failed: {e}")
+                continue
+            print(f"\n✅ {variety.upper()} finished")
+            if on_complete:
+                on_complete(variety)
+    return {variety: results[variety] for variety in varieties}
+
+
+def print_parallel_summary(results, wall_seconds):
+    print("\n" + "=" * 70)
+    print("📊 PARALLEL TRAINING SUMMARY")
+    print("=" * 70)
+    print(f"{'Variety':<14s} | {'Val MAE':>8s} | {'Epochs':>6s} | {'Time':>8s}")
+    print("-" * 46)
+    sequential_seconds = 0.0
+    for variety, metadata in results.items():
+        if isinstance(metadata, Exception):
+            print(f"{variety:<14s} | ❌ failed: {metadata}")
+        elif metadata is None:
+            print(f"{variety:<14s} | ❌ no training data")
+        else:
+            sequential_seconds += metadata['training_seconds']
+            print(f"{variety:<14s} | {metadata['validation_mae']:8.3f} | {metadata['epochs_trained']:6d} | "
+                  f"{metadata['training_seconds'] / 60:6.1f}m")
+    print("-" * 46)
+    print(f"   Wall time: {wall_seconds / 60:.1f} min "
+          f"(sum of training times: {sequential_seconds / 60:.1f} min)")
+
+
 if __name__ == "__main__":
     print("🍎 Apple Oxidation Days Prediction Model - Variety-Specific Training")
     print("Trains regression models to predict days since apple was cut")
     print("Data: Second Collection November 2024 (3 apple varieties)")
     print()
 
-    import sys
-
     ALL_VARIETIES = ['combined', 'gala', 'smith', 'red_delicious']
 
-    # Check if user wants specific variety
-    if len(sys.argv) > 1:
-        variety = sys.argv[1].lower()
+    parser = argparse.ArgumentParser(description="Train the oxidation days regression models")
+    parser.add_argument('varieties', nargs='*', type=str.lower, metavar='variety',
+                        help=f"Varieties to train: {', '.join(ALL_VARIETIES)} (default: all four)")
+    # --tfdata switches augmentation to the multi-core tf.data pipeline
+    parser.add_argument('--tfdata', action='store_true', help="Use the tf.data augmentation pipeline")
+    parser.add_argument('--epochs', type=int, default=MAX_EPOCHS, help=f"Maximum epochs (default: {MAX_EPOCHS})")
+    parser.add_argument('--patience', type=int, default=EARLY_STOPPING_PATIENCE,
+                        help=f"Early stopping patience in epochs (default: {EARLY_STOPPING_PATIENCE})")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted run: skip finished varieties, resume from the last checkpoint")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Train the varieties at the same time, one process each")
+    parser.add_argument('--shared-backbone', action='store_true',
+                        help="Train the combined model once, then only fine-tune its dense head per variety")
+    parser.add_argument('--finetune-epochs', type=int, default=FINETUNE_EPOCHS,
+                        help=f"Maximum fine-tuning epochs per variety with --shared-backbone (default: {FINETUNE_EPOCHS})")
+    parser.add_argument('--architecture', choices=ARCHITECTURES, default='baseline',
+                        help="Model architecture (default: baseline; see benchmark_architectures.py)")
+    parser.add_argument('--image-size', type=int, default=IMG_HEIGHT,
+                        help=f"Square input resolution in pixels (default: {IMG_HEIGHT})")
+    parser.add_argument('--progressive', action='store_true',
+                        help="Progressive resizing: early epochs at lower resolution (gap/separable architectures)")
+    args = parser.parse_args()
+    for variety in args.varieties:
         if variety not in ALL_VARIETIES:
-            print(f"❌ Unknown variety: {variety}")
-            print(f"   Usage: python train_regression_model.py [{' | '.join(ALL_VARIETIES)}]")
-            print("   Or run without args to train all four models")
-            sys.exit(1)
+            parser.error(f"unknown variety: {variety} (choose from {', '.join(ALL_VARIETIES)})")
+    if args.parallel and args.shared_backbone:
+        parser.error("--parallel and --shared-backbone can't be combined")
+    if args.progressive and (args.architecture == 'baseline' or args.tfdata or args.shared_backbone):
+        parser.error("--progressive needs --architecture gap or separable, and can't be combined "
+                     "with --tfdata or --shared-backbone")
 
-        print(f"Training single model: {variety}")
-        train_model(variety)
-    else:
-        # Train all four models
-        print(f"Training ALL FOUR models: {', '.join(ALL_VARIETIES)}")
-        print("=" * 70)
+    pipeline = 'tfdata' if args.tfdata else 'generator'
+    varieties = args.varieties or ALL_VARIETIES
+    image_size = (args.image_size, args.image_size)
+    train_options = dict(pipeline=pipeline, epochs=args.epochs, patience=args.patience, resume=args.resume,
+                         architecture=args.architecture, image_size=image_size, progressive=args.progressive)
+
+    state = load_run_state(args.resume)
+    if args.resume and state['completed']:
+        print(f"↪️  Resuming run - already finished: {', '.join(state['completed'])}")
+    save_run_state(state)
+
+    print(f"Training: {', '.join(varieties)}")
+    print("=" * 70)
+
+    for variety in varieties:
+        if variety in state['completed']:
+            print(f"\n⏭️  {variety.upper()} already trained in this run - skipped")
+    pending = [variety for variety in varieties if variety not in state['completed']]
+
+    def mark_completed(variety):
+        state['completed'].append(variety)
+        save_run_state(state)
+
+    if args.shared_backbone and pending:
+        # The combined model is the backbone: retrained only when 'combined' is requested (and not
+        # already finished by this run), otherwise the existing one is fine-tuned from
+        train_shared_backbone(pending, pipeline, args.epochs, args.patience, args.finetune_epochs,
+                              args.resume, state['completed'], mark_completed, args.architecture, image_size)
+        pending = []
+
+    if args.parallel and len(pending) > 1:
+        start_time = time.perf_counter()
+        results = train_parallel(pending, train_options, mark_completed)
+        print_parallel_summary(results, time.perf_counter() - start_time)
+        pending = []
+
+    for variety in pending:
+        print(f"\n\n{'='*70}")
+        print(f"STARTING: {variety.upper()} MODEL")
+        print(f"{'='*70}\n")
 
-        for variety in ALL_VARIETIES:
-            print(f"\n\n{'='*70}")
-            print(f"STARTING: {variety.upper()} MODEL")
-            print(f"{'='*70}\n")
+        train_model(variety, **train_options)
+        mark_completed(variety)
 
-            train_model(variety)
+        print(f"\n{'='*70}")
+        print(f"COMPLETED: {variety.upper()} MODEL")
+        print(f"{'='*70}\n")
 
-            print(f"\n{'='*70}")
-            print(f"COMPLETED: {variety.upper()} MODEL")
-            print(f"{'='*70}\n")
+    # Whole run finished - the next run starts fresh (failed parallel trainings keep it for --resume)
+    if all(variety in state['completed'] for variety in varieties):
+        RUN_STATE_PATH.unlink(missing_ok=True)
 
     print("\n🎯 Training Complete!")
     print("\n📊 Models saved:")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Fast Normalize Validation - Prediction drift of NORMALIZE_MODE=fast
+Runs every validation_test photo through the API preprocessing twice (full
+normalization vs fast proxy normalization) and compares each model's
+predictions. Fast mode is safe to make the default when the drift stays
+within each model's validation MAE.
+"""
+
+import sys
+import time
+import json
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+import apple_api_regression as api  # noqa: E402
+
+# Paths
+TEST_DIR = Path("data_repository/validation_test")
+
+# Worst-case drift allowed, as a fraction of the model's validation MAE
+MAX_DRIFT_FRACTION = 1.0
+
+
+def load_models():
+    """Load every regression model the API would serve"""
+    models = {}
+    for variety, model_path in api.MODEL_PATHS.items():
+        if model_path.exists():
+            models[variety] = tf.keras.models.load_model(model_path)
+            print(f"✅ {variety.upper():14} model loaded")
+        else:
+            print(f"⚠️  {variety.upper():14} model not found")
+    return models
+
+
+def load_mae(variety):
+    metadata_path = api.METADATA_PATHS[variety]
+    if metadata_path.exists():
+        with open(metadata_path, 'r') as f:
+            return json.load(f).get('validation_mae')
+    return None
+
+
+def preprocess_both(image_bytes, crop):
+    """Preprocess with full and fast normalization, timing each"""
+    start = time.perf_counter()
+    full, _, _ = api._preprocess_image(image_bytes, crop=crop, normalize=True, normalize_mode='full')
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast, _, _ = api._preprocess_image(image_bytes, crop=crop, normalize=True, normalize_mode='fast')
+    fast_time = time.perf_counter() - start
+
+    return full, fast, full_time, fast_time
+
+
+def main():
+    crop = '--crop' in sys.argv
+
+    print("\n" + "=" * 70)
+    print("🔬 FAST NORMALIZE VALIDATION - PREDICTION DRIFT")
+    print("=" * 70)
+    print(f"   Auto-crop: {'ON' if crop else 'OFF'} (pass --crop to enable)")
+    print(f"   Proxy size: {api.NORMALIZE_PROXY_SIZE}px\n")
+
+    image_paths = sorted(p for p in TEST_DIR.rglob("*") if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    if not image_paths:
+        print(f"❌ No test images found in {TEST_DIR}")
+        sys.exit(1)
+
+    models = load_models()
+    if not models:
+        print("❌ No models loaded! Train models first: python train_regression_model.py")
+        sys.exit(1)
+
+    drifts = {variety: [] for variety in models}
+    full_times, fast_times = [], []
+
+    print(f"\n{'Image':<28s} | " + " | ".join(f"{v[:13]:>13s}" for v in models))
+    print("-" * 70)
+
+    for image_path in image_paths:
+        full, fast, full_time, fast_time = preprocess_both(image_path.read_bytes(), crop)
+        full_times.append(full_time)
+        fast_times.append(fast_time)
+
+        row = []
+        for variety, model in models.items():
+            predictions = model.predict(np.concatenate([full, fast]), verbose=0)
+            drift = float(predictions[1][0] - predictions[0][0])
+            drifts[variety].append(abs(drift))
+            row.append(f"{drift:+13.3f}")
+        print(f"{image_path.name[:28]:<28s} | " + " | ".join(row))
+
+    print("\n📊 Drift summary (days, fast - full):")
+    print(f"{'Model':<14s} | {'Mean':>7s} | {'Max':>7s} | {'Val MAE':>7s} | Verdict")
+    print("-" * 70)
+
+    all_ok = True
+    for variety, values in drifts.items():
+        mae = load_mae(variety)
+        worst = max(values)
+        ok = mae is not None and worst <= mae * MAX_DRIFT_FRACTION
+        all_ok = all_ok and ok
+        mae_text = f"{mae:7.3f}" if mae is not None else f"{'N/A':>7s}"
+        verdict = "✅ within budget" if ok else "❌ too much drift"
+        print(f"{variety:<14s} | {np.mean(values):7.3f} | {worst:7.3f} | {mae_text} | {verdict}")
+
+    print(f"\n⏱️  Preprocessing: full {np.mean(full_times) * 1000:.0f}ms, "
+          f"fast {np.mean(fast_times) * 1000:.0f}ms per image")
+
+    if all_ok:
+        print("\n🎯 Max drift is within every model's validation MAE")
+        print("   NORMALIZE_MODE=fast is safe to use as the default")
+    else:
+        print("\n⚠️  Keep NORMALIZE_MODE=full (the default)")
+
+
+if __name__ == "__main__":
+    main()